@@ -1,8 +1,13 @@
+from json import dumps
+from os import environ
+
 from granian.constants import Interfaces
 from granian.server import Server
 
 from server.app import app
 from server.config import Config
+from server.features.chat import ChatReplicaPool
+from server.lifespans import chat_model_factory
 
 
 def main() -> None:
@@ -26,7 +31,11 @@ def main() -> None:
         reload=False,
     )
 
-    granian.serve()
+    with ChatReplicaPool(config.chat_replicas, chat_model_factory(config)) as chat_replica_addresses:
+        if chat_replica_addresses:
+            environ["CHAT_REPLICA_ADDRESSES"] = dumps(chat_replica_addresses)
+
+        granian.serve()
 
 
 if __name__ == "__main__":
@@ -1 +1,2 @@
 from server.api.health import health as health
+from server.api.ready import ready as ready
@@ -0,0 +1,22 @@
+from litestar import Response, get
+from litestar.status_codes import HTTP_200_OK, HTTP_503_SERVICE_UNAVAILABLE
+
+from server.schemas import Readiness
+from server.typedefs import AppState
+
+
+@get("/ready", sync_to_thread=False)
+def ready(state: AppState) -> Response[Readiness]:
+    """
+    Summary
+    -------
+    the `/ready` route reports whether the models have loaded, unlike `/health` which only reports liveness
+    """
+    chat_status = state.chat.status
+    ner_status = state.ner.status
+    is_ready = chat_status in {"ready", "deferred"} and ner_status in {"ready", "deferred"}
+
+    return Response(
+        Readiness(ready=is_ready, chat=chat_status, ner=ner_status),
+        status_code=HTTP_200_OK if is_ready else HTTP_503_SERVICE_UNAVAILABLE,
+    )
@@ -1,19 +1,98 @@
-from asyncio import wrap_future
-from concurrent.futures import ThreadPoolExecutor
+from collections.abc import AsyncIterator
 from threading import Event
 from time import perf_counter_ns
+from typing import Annotated
 
 from litestar import Controller, Request, post
-from litestar.background_tasks import BackgroundTask
-from litestar.concurrency import _State as ConcurrencyState
+from litestar.concurrency import sync_to_thread
+from litestar.params import Parameter
 from litestar.response import ServerSentEvent
 from litestar.status_codes import HTTP_200_OK
 
+from server.features.chat import FlushBoundary, FlushPolicy, GenerationParameters, coalesce
 from server.schemas.v1 import Answer, Benchmark, Query
 from server.typedefs import AppState
 from server.utils import PersistentConnection
 
 
+def get_client(request: Request[None, None, AppState], state: AppState) -> str:
+    """
+    Summary
+    -------
+    identify the client of a chat query, so that each client is scheduled in turn
+
+    Parameters
+    ----------
+    request (Request[None, None, AppState])
+        the request
+
+    state (AppState)
+        the application state
+
+    Returns
+    -------
+    client (str)
+        the value of the client header, or the client address if it is absent
+    """
+    if client := request.headers.get(state.config.chat_client_header):
+        return client
+
+    return request.client.host if request.client else ""
+
+
+def get_parameters(query: Query) -> GenerationParameters:
+    """
+    Summary
+    -------
+    extract the generation parameters of a chat query
+
+    Parameters
+    ----------
+    query (Query)
+        the chat query
+
+    Returns
+    -------
+    parameters (GenerationParameters)
+        the generation parameters
+    """
+    return GenerationParameters(
+        max_tokens=query.max_tokens,
+        temperature=query.temperature,
+        top_k=query.top_k,
+        top_p=query.top_p,
+        stop=query.stop,
+        seed=query.seed,
+    )
+
+
+async def cancel_on_close(answer: AsyncIterator[str], event: Event) -> AsyncIterator[str]:
+    """
+    Summary
+    -------
+    stream an answer, cancelling its generation as soon as the stream is closed
+
+    Parameters
+    ----------
+    answer (AsyncIterator[str])
+        the answer being generated
+
+    event (Event)
+        the event that signals the query should be cancelled
+
+    Yields
+    -------
+    answer (str)
+        the generated answer
+    """
+    try:
+        async for piece in answer:
+            yield piece
+
+    finally:
+        event.set()
+
+
 class ChatController(Controller):
     """
     Summary
@@ -31,39 +110,94 @@ class ChatController(Controller):
         the `/chat` route provides an endpoint for querying the chat model
         """
         event = Event()
-        thread_pool = ConcurrencyState.EXECUTOR or ThreadPoolExecutor()
+        answer = None
 
         async with PersistentConnection(request.receive, event=event):
-            answer = await wrap_future(thread_pool.submit(tuple, state.chat.query(data.messages, event) or ()))
+            chat_model = await sync_to_thread(state.chat.get)
+            stream = await chat_model.query_async(
+                data.messages,
+                event,
+                static_prompt=data.static_prompt,
+                parameters=get_parameters(data),
+                model=data.model,
+                client=get_client(request, state),
+            )
+            answer = [piece async for piece in stream] if stream else None
 
         return Answer(answer="".join(answer) if answer else "Max query length exceeded!")
 
-    @post("/stream", sync_to_thread=True)
-    def query_stream(self, state: AppState, data: Query, event_type: str | None = None) -> ServerSentEvent:
+    @post("/stream")
+    async def query_stream(
+        self,
+        request: Request[None, None, AppState],
+        state: AppState,
+        data: Query,
+        *,
+        event_type: str | None = None,
+        flush_tokens: Annotated[
+            int | None,
+            Parameter(description="the number of tokens to coalesce into each event, or `0` to disable it", ge=0),
+        ] = None,
+        flush_ms: Annotated[
+            float | None,
+            Parameter(description="the milliseconds after which to flush buffered tokens, or `0` to disable it", ge=0),
+        ] = None,
+        flush_on: Annotated[
+            FlushBoundary | None,
+            Parameter(description="the boundary up to which to flush buffered tokens whenever one is reached"),
+        ] = None,
+    ) -> ServerSentEvent:
         """
         Summary
         -------
         the `/chat/stream` route provides an SSE endpoint for querying the chat model
         """
+        config = state.config
+        flush_policy = FlushPolicy(
+            max_pieces=config.chat_stream_flush_tokens if flush_tokens is None else flush_tokens,
+            max_delay=(config.chat_stream_flush_ms if flush_ms is None else flush_ms) / 1000,
+            boundary=flush_on or config.chat_stream_flush_boundary,
+        )
         event = Event()
+        answer = None
+
+        async with PersistentConnection(request.receive, event=event):
+            chat_model = await sync_to_thread(state.chat.get)
+            answer = await chat_model.query_async(
+                data.messages,
+                event,
+                static_prompt=data.static_prompt,
+                parameters=get_parameters(data),
+                model=data.model,
+                client=get_client(request, state),
+            )
 
         return ServerSentEvent(
-            answer if (answer := state.chat.query(data.messages, event)) else "Max query length exceeded!",
+            cancel_on_close(coalesce(answer, flush_policy), event) if answer else "Max query length exceeded!",
             event_type=event_type,
             status_code=HTTP_200_OK,
-            background=BackgroundTask(event.set),
         )
 
     @post("/benchmark", status_code=HTTP_200_OK, sync_to_thread=True)
-    def benchmark(self, state: AppState, data: Query) -> Benchmark:
+    def benchmark(self, request: Request[None, None, AppState], state: AppState, data: Query) -> Benchmark:
         """
         Summary
         -------
         the `/chat/benchmark` route provides an endpoint for benchmarking the chat model
         """
         event = Event()
+        chat_model = state.chat.get()
         start = perf_counter_ns()
-        answer = tuple(state.chat.query(data.messages, event) or ("Max query length exceeded!",))
+        stream = chat_model.query(
+            data.messages,
+            event,
+            static_prompt=data.static_prompt,
+            parameters=get_parameters(data),
+            model=data.model,
+            client=get_client(request, state),
+            priority="batch",
+        )
+        answer = tuple(stream or ("Max query length exceeded!",))
         total_time = (perf_counter_ns() - start) / 1e9
         tokens = len(answer)
 
@@ -1,10 +1,11 @@
 from typing import Annotated
 
-from litestar import Controller, get
+from litestar import Controller, get, post
 from litestar.openapi.spec import Example
 from litestar.params import Parameter
+from litestar.status_codes import HTTP_200_OK
 
-from server.schemas.v1 import Entities
+from server.schemas.v1 import Entities, EntitiesBatch, EntitySpans, EntitySpansBatch, Texts
 from server.typedefs import AppState
 
 
@@ -17,7 +18,7 @@ class NamedEntityRecognitionController(Controller):
 
     path = "/entities"
 
-    @get(cache=True, sync_to_thread=True)
+    @get(sync_to_thread=True)
     def extract(
         self,
         state: AppState,
@@ -29,10 +30,35 @@ class NamedEntityRecognitionController(Controller):
                 examples=[Example(id="Example", value="Hello, my name is John and I live in New York.")],
             ),
         ],
-    ) -> Entities:
+        *,
+        aggregate: Annotated[
+            bool,
+            Parameter(description="whether to aggregate the tokens of each entity into a single span"),
+        ] = False,
+    ) -> Entities | EntitySpans:
         """
         Summary
         -------
         the `/entities` route provides an endpoint for extracting named entities from text
         """
-        return Entities(entities=tuple(next(state.ner.extract([text]))))
+        ner_model = state.ner.get()
+
+        if aggregate:
+            return EntitySpans(entities=tuple(next(ner_model.extract_spans([text]))))
+
+        return Entities(entities=tuple(next(ner_model.extract([text]))))
+
+    @post("/batch", status_code=HTTP_200_OK, sync_to_thread=True)
+    def extract_batch(self, state: AppState, data: Texts) -> EntitiesBatch | EntitySpansBatch:
+        """
+        Summary
+        -------
+        the `/entities/batch` route provides an endpoint for extracting named entities from many texts at once
+        """
+        ner_model = state.ner.get()
+        texts = list(data.texts)
+
+        if data.aggregate:
+            return EntitySpansBatch(entities=tuple(tuple(spans) for spans in ner_model.extract_spans(texts)))
+
+        return EntitiesBatch(entities=tuple(tuple(entities) for entities in ner_model.extract(texts)))
@@ -9,12 +9,16 @@ from litestar.datastructures import State
 from litestar.openapi import OpenAPIConfig
 from litestar.openapi.spec import Server
 from litestar.plugins import PluginProtocol
-from litestar.status_codes import HTTP_500_INTERNAL_SERVER_ERROR
+from litestar.status_codes import (
+    HTTP_404_NOT_FOUND,
+    HTTP_500_INTERNAL_SERVER_ERROR,
+    HTTP_503_SERVICE_UNAVAILABLE,
+)
 
-from server.api import health, v1
+from server.api import health, ready, v1
 from server.config import Config
-from server.lifespans import load_chat_model
-from server.lifespans.ner_model import load_ner_model
+from server.features.chat import ChatModelNotFoundError, ChatQueueFullError, StaticPromptNotFoundError
+from server.lifespans import load_chat_model, load_ner_model
 from server.plugins import ConsulPlugin
 from server.telemetry import get_log_handler, get_meter_provider, get_tracer_provider
 
@@ -44,6 +48,44 @@ def exception_handler(logger: Logger, _, exception: Exception) -> Response[dict[
     )
 
 
+def not_found_handler(_, exception: Exception) -> Response[dict[str, str]]:
+    """
+    Summary
+    -------
+    the Litestar exception handler for requests that reference missing resources
+
+    Parameters
+    ----------
+    request (Request)
+        the request
+
+    exception (Exception)
+        the exception
+    """
+    return Response(content={"detail": str(exception)}, status_code=HTTP_404_NOT_FOUND)
+
+
+def queue_full_handler(_, exception: ChatQueueFullError) -> Response[dict[str, str]]:
+    """
+    Summary
+    -------
+    the Litestar exception handler for queries shed because the chat model is at capacity
+
+    Parameters
+    ----------
+    request (Request)
+        the request
+
+    exception (ChatQueueFullError)
+        the exception
+    """
+    return Response(
+        content={"detail": str(exception)},
+        status_code=HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": str(exception.retry_after)},
+    )
+
+
 def app() -> Litestar:
     """
     Summary
@@ -68,8 +110,8 @@ def app() -> Litestar:
     v1_router = Router("/v1", tags=["v1"], route_handlers=[v1.ChatController, v1.NamedEntityRecognitionController])
 
     lifespans = [
-        load_chat_model(config.chat_model_threads, use_cuda=config.use_cuda, stub=config.stub),
-        load_ner_model(),
+        load_chat_model(config),
+        load_ner_model(config),
     ]
 
     if config.otel_exporter_otlp_endpoint:
@@ -97,8 +139,13 @@ def app() -> Litestar:
 
     return Litestar(
         openapi_config=openapi_config,
-        exception_handlers={HTTP_500_INTERNAL_SERVER_ERROR: partial(exception_handler, logger)},
-        route_handlers=[v1_router, health],
+        exception_handlers={
+            HTTP_500_INTERNAL_SERVER_ERROR: partial(exception_handler, logger),
+            StaticPromptNotFoundError: not_found_handler,
+            ChatModelNotFoundError: not_found_handler,
+            ChatQueueFullError: queue_full_handler,
+        },
+        route_handlers=[v1_router, health, ready],
         plugins=plugins,
         lifespan=lifespans,
         state=State({"config": config}),
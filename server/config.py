@@ -1,5 +1,9 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
+from server.typedefs import ChatModelSpec, ChatModelTier, StaticPrompt
+
 
 class Config(BaseSettings):
     """
@@ -24,12 +28,90 @@ class Config(BaseSettings):
     stub (bool)
         whether to use a stub model
 
+    lazy_models (list[Literal["chat", "ner"]])
+        the models to defer loading until their first request, instead of loading them in the background on startup
+
+    chat_models (dict[str, ChatModelSpec])
+        the chat models queries can select by name, each loaded on its first query
+
+    chat_default_model (str)
+        the name of the chat model to query when a query does not select one and there are no tiers, loaded on startup
+
+    chat_model_tiers (list[ChatModelTier])
+        the chat models to route queries that do not select one to by their estimated length, escalating long queries
+
+    chat_model_memory_bytes (int)
+        the number of bytes the loaded chat models may occupy before idle ones are unloaded, or `0` for no limit
+
     chat_model_threads (int)
         the number of threads to use for the chat model
 
+    chat_model_intra_threads (int)
+        the number of computation threads each chat model thread uses, or `0` for the default
+
+    chat_replicas (int)
+        the number of chat model replica processes to shard the chat model across, or `0` to load it in every worker
+
+    chat_replica_addresses (list[str])
+        the Unix socket addresses of the chat model replicas, populated on startup when `chat_replicas` is set
+
     use_cuda (bool)
         whether to use CUDA for inference
 
+    chat_max_batch_size (int)
+        the maximum number of concurrent chat queries to generate in a single batch
+
+    chat_batch_window_ms (float)
+        the number of milliseconds to wait for more chat queries before generating a batch
+
+    chat_max_in_flight (int)
+        the number of chat queries each worker generates concurrently, or `0` for `chat_max_batch_size` per model thread
+
+    chat_max_queued (int)
+        the number of chat queries each worker queues beyond `chat_max_in_flight` before rejecting new queries
+
+    chat_client_header (str)
+        the request header identifying the client of a chat query, falling back to the client address when absent
+
+    chat_response_cache_bytes (int)
+        the maximum number of bytes of answers to cache for repeated queries, or `0` to disable it
+
+    chat_response_cache_ttl_s (float)
+        the number of seconds a cached answer is served for before it is generated again
+
+    chat_stream_flush_tokens (int)
+        the default number of tokens to coalesce into each streamed event, or `0` to disable it
+
+    chat_stream_flush_ms (float)
+        the default number of milliseconds after which to flush buffered tokens as an event, or `0` to disable it
+
+    chat_stream_flush_boundary (Literal["none", "whitespace", "sentence"])
+        the default boundary up to which to flush buffered tokens as an event, or `none` to disable it
+
+    chat_static_prompts (dict[str, StaticPrompt])
+        the static prompts queries can select by name, encoded once on startup
+
+    ner_max_batch_size (int)
+        the maximum number of texts to coalesce into a single named entity recognition batch
+
+    ner_max_batch_tokens (int)
+        the maximum number of tokens, counting padding, to encode in a single named entity recognition batch
+
+    ner_window_overlap (int)
+        the number of tokens shared by consecutive windows of texts too long for the named entity recognition model
+
+    ner_batch_window_ms (float)
+        the number of milliseconds to wait for more named entity recognition requests before extracting a batch
+
+    ner_cache_bytes (int)
+        the maximum number of bytes of named entity recognition results to cache in memory, or `0` to disable it
+
+    ner_cache_path (str | None)
+        the path to a SQLite database to share cached named entity recognition results across workers through
+
+    ner_cache_disk_bytes (int)
+        the maximum number of bytes of named entity recognition results to keep in the SQLite database
+
     otel_exporter_otlp_endpoint (str | None)
         the OTLP endpoint for OpenTelemetry exporter
 
@@ -48,9 +130,41 @@ class Config(BaseSettings):
     server_root_path: str = "/api"
     worker_count: int = 1
     stub: bool = False
-
+    lazy_models: list[Literal["chat", "ner"]] = []
+
+    chat_models: dict[str, ChatModelSpec] = {
+        "qwen2.5-7b": {
+            "repository": "winstxnhdw/Qwen2.5-7B-Instruct-ct2-int8",
+            "max_context_length": 131072,
+        },
+    }
+    chat_default_model: str = "qwen2.5-7b"
+    chat_model_tiers: list[ChatModelTier] = []
+    chat_model_memory_bytes: int = 0
     chat_model_threads: int = 1
+    chat_model_intra_threads: int = 0
+    chat_replicas: int = 0
+    chat_replica_addresses: list[str] = []
     use_cuda: bool = False
+    chat_max_batch_size: int = 16
+    chat_batch_window_ms: float = 5
+    chat_max_in_flight: int = 0
+    chat_max_queued: int = 64
+    chat_client_header: str = "X-API-Key"
+    chat_response_cache_bytes: int = 0
+    chat_response_cache_ttl_s: float = 300
+    chat_stream_flush_tokens: int = 0
+    chat_stream_flush_ms: float = 0
+    chat_stream_flush_boundary: Literal["none", "whitespace", "sentence"] = "none"
+    chat_static_prompts: dict[str, StaticPrompt] = {}
+
+    ner_max_batch_size: int = 32
+    ner_max_batch_tokens: int = 8192
+    ner_window_overlap: int = 128
+    ner_batch_window_ms: float = 2
+    ner_cache_bytes: int = 64 * 1024 * 1024
+    ner_cache_path: str | None = None
+    ner_cache_disk_bytes: int = 1024 * 1024 * 1024
 
     otel_exporter_otlp_endpoint: str | None = None
 
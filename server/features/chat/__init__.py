@@ -1,2 +1,15 @@
+from server.features.chat.admission import AdmittedChatAgent as AdmittedChatAgent
+from server.features.chat.admission import ChatQueueFullError as ChatQueueFullError
+from server.features.chat.admission import Priority as Priority
+from server.features.chat.flush import FlushBoundary as FlushBoundary
+from server.features.chat.flush import FlushPolicy as FlushPolicy
+from server.features.chat.flush import coalesce as coalesce
+from server.features.chat.model import StaticPromptNotFoundError as StaticPromptNotFoundError
 from server.features.chat.model import get_chat_model as get_chat_model
+from server.features.chat.model import get_chat_model_size as get_chat_model_size
+from server.features.chat.parameters import GenerationParameters as GenerationParameters
+from server.features.chat.pool import ChatModelNotFoundError as ChatModelNotFoundError
+from server.features.chat.pool import ChatModelPool as ChatModelPool
 from server.features.chat.protocol import ChatAgentProtocol as ChatAgentProtocol
+from server.features.chat.replica import ChatReplicaPool as ChatReplicaPool
+from server.features.chat.router import ChatReplicaRouter as ChatReplicaRouter
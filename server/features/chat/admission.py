@@ -0,0 +1,642 @@
+from asyncio import AbstractEventLoop, Future, get_running_loop
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterator, Hashable, Iterator, Sequence
+from contextlib import suppress
+from functools import partial
+from math import ceil
+from threading import Event as ThreadingEvent
+from threading import Lock
+from time import monotonic
+from types import TracebackType
+from typing import Literal, Self
+from weakref import finalize
+
+from anyio import to_thread
+from opentelemetry.metrics import get_meter
+
+from server.features.chat.model import replay
+from server.features.chat.parameters import GenerationParameters
+from server.features.chat.protocol import ChatAgentProtocol
+from server.typedefs import Event, Message
+
+type Priority = Literal["interactive", "batch"]
+
+PRIORITIES: tuple[Priority, ...] = ("interactive", "batch")
+
+
+class ChatQueueFullError(Exception):
+    def __init__(self, retry_after: int) -> None:
+        super().__init__("The chat model is at capacity, please retry later!")
+        self.retry_after = retry_after
+
+
+def resolve(future: Future[None]) -> None:
+    """
+    Summary
+    -------
+    resolve a future unless it is already done
+
+    Parameters
+    ----------
+    future (Future[None])
+        the future to resolve
+    """
+    if not future.done():
+        future.set_result(None)
+
+
+class AdmissionTicket:
+    """
+    Summary
+    -------
+    a slot held by an admitted query, released exactly once
+
+    Parameters
+    ----------
+    controller (AdmissionController)
+        the controller that admitted the query
+
+    client (Hashable)
+        the client that sent the query
+
+    priority (Priority)
+        the priority class of the query
+
+    Methods
+    -------
+    wait(cancel_event: Event) -> bool
+        wait until the query is granted a generation slot
+
+    wait_async() -> None
+        wait on the event loop until the query is granted a generation slot
+
+    wake() -> None
+        mark the query as granted and wake whoever is waiting on it
+
+    release() -> None
+        give the slot back to the controller
+    """
+
+    __slots__ = ("admitted_at", "client", "controller", "granted", "granted_at", "priority", "released", "waiter")
+
+    def __init__(self, controller: AdmissionController, client: Hashable, priority: Priority) -> None:
+        self.controller = controller
+        self.client = client
+        self.priority = priority
+        self.admitted_at = monotonic()
+        self.granted_at = self.admitted_at
+        self.granted = ThreadingEvent()
+        self.waiter: tuple[AbstractEventLoop, Future[None]] | None = None
+        self.released = False
+
+    def wait(self, cancel_event: Event) -> bool:
+        """
+        Summary
+        -------
+        wait until the query is granted a generation slot
+
+        Parameters
+        ----------
+        cancel_event (Event)
+            the event that signals the query should be cancelled
+
+        Returns
+        -------
+        granted (bool)
+            whether the query was granted a slot before it was cancelled
+        """
+        while not self.granted.wait(self.controller.poll_interval):
+            if cancel_event.is_set():
+                return False
+
+        return True
+
+    async def wait_async(self) -> None:
+        """
+        Summary
+        -------
+        wait on the event loop until the query is granted a generation slot
+        """
+        if self.granted.is_set():
+            return
+
+        loop = get_running_loop()
+        granted = loop.create_future()
+        self.waiter = (loop, granted)
+
+        if not self.granted.is_set():
+            await granted
+
+    def wake(self) -> None:
+        """
+        Summary
+        -------
+        mark the query as granted and wake whoever is waiting on it
+        """
+        self.granted.set()
+
+        if self.waiter is not None:
+            loop, granted = self.waiter
+
+            with suppress(RuntimeError):
+                loop.call_soon_threadsafe(resolve, granted)
+
+    def release(self) -> None:
+        """
+        Summary
+        -------
+        give the slot back to the controller
+        """
+        if not self.released:
+            self.released = True
+            self.controller.release(self)
+
+
+class AdmissionController:
+    """
+    Summary
+    -------
+    bounds the number of outstanding queries, granting generation slots by priority class and round-robin across
+    clients within a class, and shedding the excess with an estimate of when to retry
+
+    Parameters
+    ----------
+    max_in_flight (int)
+        the number of queries that can be generated concurrently
+
+    max_queued (int)
+        the number of queries that can wait for a generation slot before new queries are rejected
+
+    Methods
+    -------
+    acquire(client: Hashable, priority: Priority) -> AdmissionTicket
+        admit a query or reject it if the queue is full
+
+    grant(ticket: AdmissionTicket) -> None
+        give a generation slot to an admitted query
+
+    next_waiting() -> AdmissionTicket | None
+        take the next query to grant a slot to
+
+    release(ticket: AdmissionTicket) -> None
+        record the completion or abandonment of an admitted query
+    """
+
+    __slots__ = (
+        "active",
+        "lock",
+        "max_in_flight",
+        "max_queued",
+        "mean_duration",
+        "outstanding",
+        "queued",
+        "rejected",
+        "running",
+        "wait_time",
+        "waiting",
+    )
+
+    smoothing = 0.1
+    poll_interval = 0.5
+
+    def __init__(self, max_in_flight: int, max_queued: int) -> None:
+        meter = get_meter(__name__)
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.outstanding = 0
+        self.running = 0
+        self.mean_duration = 1.0
+        self.lock = Lock()
+        self.waiting: dict[Priority, OrderedDict[Hashable, deque[AdmissionTicket]]] = {
+            priority: OrderedDict() for priority in PRIORITIES
+        }
+        self.active = meter.create_up_down_counter(
+            "chat.admission.active",
+            unit="{query}",
+            description="queries holding a generation slot",
+        )
+        self.queued = meter.create_up_down_counter(
+            "chat.admission.queued",
+            unit="{query}",
+            description="admitted queries waiting for a generation slot",
+        )
+        self.rejected = meter.create_counter(
+            "chat.admission.rejected",
+            unit="{query}",
+            description="queries rejected because the queue was full",
+        )
+        self.wait_time = meter.create_histogram(
+            "chat.admission.wait_time",
+            unit="s",
+            description="time admitted queries waited for a generation slot",
+        )
+
+    def acquire(self, client: Hashable, priority: Priority) -> AdmissionTicket:
+        """
+        Summary
+        -------
+        admit a query or reject it if the queue is full
+
+        Parameters
+        ----------
+        client (Hashable)
+            the client that sent the query
+
+        priority (Priority)
+            the priority class of the query
+
+        Returns
+        -------
+        ticket (AdmissionTicket)
+            the slot held by the query until it is released
+        """
+        attributes = {"priority": priority}
+
+        with self.lock:
+            if self.outstanding >= self.max_in_flight + self.max_queued:
+                queries_ahead = self.outstanding - self.running + 1
+                retry_after = ceil(self.mean_duration * queries_ahead / self.max_in_flight)
+                self.rejected.add(1, attributes)
+                raise ChatQueueFullError(max(retry_after, 1))
+
+            self.outstanding += 1
+            ticket = AdmissionTicket(self, client, priority)
+
+            if self.running < self.max_in_flight:
+                self.grant(ticket)
+            else:
+                self.waiting[priority].setdefault(client, deque()).append(ticket)
+                self.queued.add(1, attributes)
+
+        return ticket
+
+    def grant(self, ticket: AdmissionTicket) -> None:
+        """
+        Summary
+        -------
+        give a generation slot to an admitted query, the lock must be held
+
+        Parameters
+        ----------
+        ticket (AdmissionTicket)
+            the ticket of the query
+        """
+        self.running += 1
+        ticket.granted_at = monotonic()
+        ticket.wake()
+        self.active.add(1, {"priority": ticket.priority})
+        self.wait_time.record(ticket.granted_at - ticket.admitted_at, {"priority": ticket.priority})
+
+    def next_waiting(self) -> AdmissionTicket | None:
+        """
+        Summary
+        -------
+        take the next query to grant a slot to, the lock must be held
+
+        Returns
+        -------
+        ticket (AdmissionTicket | None)
+            the oldest query of the next client in the highest priority class with waiting queries
+        """
+        for priority, clients in self.waiting.items():
+            if not clients:
+                continue
+
+            client, tickets = next(iter(clients.items()))
+            ticket = tickets.popleft()
+
+            if tickets:
+                clients.move_to_end(client)
+            else:
+                del clients[client]
+
+            self.queued.add(-1, {"priority": priority})
+            return ticket
+
+        return None
+
+    def release(self, ticket: AdmissionTicket) -> None:
+        """
+        Summary
+        -------
+        record the completion or abandonment of an admitted query
+
+        Parameters
+        ----------
+        ticket (AdmissionTicket)
+            the ticket of the query
+        """
+        with self.lock:
+            self.outstanding -= 1
+
+            if not ticket.granted.is_set():
+                clients = self.waiting[ticket.priority]
+                clients[ticket.client].remove(ticket)
+                self.queued.add(-1, {"priority": ticket.priority})
+
+                if not clients[ticket.client]:
+                    del clients[ticket.client]
+
+                return
+
+            self.running -= 1
+            self.mean_duration += self.smoothing * (monotonic() - ticket.granted_at - self.mean_duration)
+            self.active.add(-1, {"priority": ticket.priority})
+
+            if (next_ticket := self.next_waiting()) is not None:
+                self.grant(next_ticket)
+
+
+class AdmittedChatAgent(ChatAgentProtocol):
+    """
+    Summary
+    -------
+    a chat agent that schedules queries fairly onto the chat agent it wraps, rejecting those beyond its capacity and
+    answering queries with a cached answer without admitting them
+
+    Parameters
+    ----------
+    chat_agent (ChatAgentProtocol)
+        the chat agent to admit queries to
+
+    max_in_flight (int)
+        the number of queries that can be generated concurrently
+
+    max_queued (int)
+        the number of queries that can wait for a generation slot before new queries are rejected
+
+    Methods
+    -------
+    lookup(messages: Sequence[Message], *, static_prompt: str | None = None, ...) -> tuple[str, ...] | None
+        look up the cached answer to a query without admitting it
+
+    query(messages: Sequence[Message], cancel_event: Event, *, ...) -> Iterator[str] | None
+        query the chat agent once the query is granted a generation slot
+
+    query_async(messages: Sequence[Message], cancel_event: Event, *, ...) -> AsyncIterator[str] | None
+        query the chat agent on the event loop once the query is granted a generation slot
+
+    stream(answer: Iterator[str], ticket: AdmissionTicket) -> Iterator[str]
+        stream an answer, releasing its slot once it completes or is closed
+
+    stream_async(answer: AsyncIterator[str], ticket: AdmissionTicket) -> AsyncIterator[str]
+        stream an answer on the event loop, releasing its slot once it completes or is closed
+    """
+
+    __slots__ = ("admission", "chat_agent")
+
+    def __init__(self, chat_agent: ChatAgentProtocol, *, max_in_flight: int, max_queued: int) -> None:
+        self.chat_agent = chat_agent
+        self.admission = AdmissionController(max_in_flight, max_queued)
+
+    def __enter__(self) -> Self:
+        self.chat_agent.__enter__()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.chat_agent.__exit__(exc_type, exc_value, traceback)
+
+    def lookup(
+        self,
+        messages: Sequence[Message],
+        *,
+        static_prompt: str | None = None,
+        parameters: GenerationParameters | None = None,
+        model: str | None = None,
+    ) -> tuple[str, ...] | None:
+        """
+        Summary
+        -------
+        look up the cached answer to a query without admitting it
+
+        Parameters
+        ----------
+        messages (Sequence[Message])
+            the messages to query the model with
+
+        static_prompt (str | None)
+            the name of the static prompt to precede the messages with
+
+        parameters (GenerationParameters | None)
+            the generation parameters, or `None` for greedy decoding up to the model's maximum length
+
+        model (str | None)
+            the name of the model to query, or `None` for the default model
+
+        Returns
+        -------
+        answer (tuple[str, ...] | None)
+            the pieces of the cached answer, or `None` if the query has to be generated
+        """
+        return self.chat_agent.lookup(messages, static_prompt=static_prompt, parameters=parameters, model=model)
+
+    def query(
+        self,
+        messages: Sequence[Message],
+        cancel_event: Event,
+        *,
+        static_prompt: str | None = None,
+        parameters: GenerationParameters | None = None,
+        model: str | None = None,
+        client: Hashable = None,
+        priority: Priority = "interactive",
+    ) -> Iterator[str] | None:
+        """
+        Summary
+        -------
+        query the chat agent once the query is granted a generation slot, blocking while it waits, or answer it from
+        the response cache without admitting it
+
+        Parameters
+        ----------
+        messages (Sequence[Message])
+            the messages to query the model with
+
+        cancel_event (Event)
+            the event that signals the query should be cancelled
+
+        static_prompt (str | None)
+            the name of the static prompt to precede the messages with
+
+        parameters (GenerationParameters | None)
+            the generation parameters, or `None` for greedy decoding up to the model's maximum length
+
+        model (str | None)
+            the name of the model to query, or `None` for the default model
+
+        client (Hashable)
+            the client that sent the query, whose queries are scheduled in turn with other clients
+
+        priority (Priority)
+            the priority class of the query
+
+        Returns
+        -------
+        answer (Iterator[str] | None)
+            the answer to the query
+        """
+        cached_answer = self.lookup(messages, static_prompt=static_prompt, parameters=parameters, model=model)
+
+        if cached_answer is not None:
+            return iter(cached_answer)
+
+        ticket = self.admission.acquire(client, priority)
+
+        try:
+            if not ticket.wait(cancel_event):
+                ticket.release()
+                return iter(())
+
+            answer = self.chat_agent.query(
+                messages,
+                cancel_event,
+                static_prompt=static_prompt,
+                parameters=parameters,
+                model=model,
+            )
+
+        except BaseException:
+            ticket.release()
+            raise
+
+        if answer is None:
+            ticket.release()
+            return None
+
+        stream = self.stream(answer, ticket)
+        finalize(stream, ticket.release)
+
+        return stream
+
+    async def query_async(
+        self,
+        messages: Sequence[Message],
+        cancel_event: Event,
+        *,
+        static_prompt: str | None = None,
+        parameters: GenerationParameters | None = None,
+        model: str | None = None,
+        client: Hashable = None,
+        priority: Priority = "interactive",
+    ) -> AsyncIterator[str] | None:
+        """
+        Summary
+        -------
+        query the chat agent on the event loop once the query is granted a generation slot, or answer it from the
+        response cache without admitting it
+
+        Parameters
+        ----------
+        messages (Sequence[Message])
+            the messages to query the model with
+
+        cancel_event (Event)
+            the event that signals the query should be cancelled
+
+        static_prompt (str | None)
+            the name of the static prompt to precede the messages with
+
+        parameters (GenerationParameters | None)
+            the generation parameters, or `None` for greedy decoding up to the model's maximum length
+
+        model (str | None)
+            the name of the model to query, or `None` for the default model
+
+        client (Hashable)
+            the client that sent the query, whose queries are scheduled in turn with other clients
+
+        priority (Priority)
+            the priority class of the query
+
+        Returns
+        -------
+        answer (AsyncIterator[str] | None)
+            the answer to the query
+        """
+        cached_answer = await to_thread.run_sync(
+            partial(self.lookup, messages, static_prompt=static_prompt, parameters=parameters, model=model),
+        )
+
+        if cached_answer is not None:
+            return replay(cached_answer)
+
+        ticket = self.admission.acquire(client, priority)
+
+        try:
+            await ticket.wait_async()
+            answer = await self.chat_agent.query_async(
+                messages,
+                cancel_event,
+                static_prompt=static_prompt,
+                parameters=parameters,
+                model=model,
+            )
+
+        except BaseException:
+            ticket.release()
+            raise
+
+        if answer is None:
+            ticket.release()
+            return None
+
+        stream = self.stream_async(answer, ticket)
+        finalize(stream, ticket.release)
+
+        return stream
+
+    def stream(self, answer: Iterator[str], ticket: AdmissionTicket) -> Iterator[str]:
+        """
+        Summary
+        -------
+        stream an answer, releasing its slot once it completes or is closed
+
+        Parameters
+        ----------
+        answer (Iterator[str])
+            the answer being generated
+
+        ticket (AdmissionTicket)
+            the slot held by the query
+
+        Yields
+        -------
+        answer (str)
+            the generated answer
+        """
+        try:
+            yield from answer
+
+        finally:
+            ticket.release()
+
+    async def stream_async(self, answer: AsyncIterator[str], ticket: AdmissionTicket) -> AsyncIterator[str]:
+        """
+        Summary
+        -------
+        stream an answer on the event loop, releasing its slot once it completes or is closed
+
+        Parameters
+        ----------
+        answer (AsyncIterator[str])
+            the answer being generated
+
+        ticket (AdmissionTicket)
+            the slot held by the query
+
+        Yields
+        -------
+        answer (str)
+            the generated answer
+        """
+        try:
+            async for piece in answer:
+                yield piece
+
+        finally:
+            ticket.release()
@@ -0,0 +1,102 @@
+from codecs import getincrementaldecoder
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Iterator, Mapping
+
+
+def byte_level_alphabet() -> dict[str, int]:
+    """
+    Summary
+    -------
+    map the printable characters used by byte-level BPE vocabularies back to the bytes they represent
+
+    Returns
+    -------
+    alphabet (dict[str, int])
+        the byte represented by each character
+    """
+    printable = [*range(ord("!"), ord("~") + 1), *range(ord("¡"), ord("¬") + 1), *range(ord("®"), ord("ÿ") + 1)]
+    alphabet = {chr(byte): byte for byte in printable}
+    unprintable = (byte for byte in range(256) if byte not in printable)
+
+    for offset, byte in enumerate(unprintable):
+        alphabet[chr(256 + offset)] = byte
+
+    return alphabet
+
+
+class Detokeniser:
+    """
+    Summary
+    -------
+    an incremental detokeniser for byte-level BPE vocabularies
+
+    Methods
+    -------
+    stream(token_ids: Iterable[int]) -> Iterator[str]
+        decode a stream of token IDs into complete UTF-8 text
+
+    stream_async(token_ids: AsyncIterable[int]) -> AsyncIterator[str]
+        decode an asynchronous stream of token IDs into complete UTF-8 text
+    """
+
+    __slots__ = ("token_bytes",)
+
+    def __init__(self, vocabulary: Mapping[str, int]) -> None:
+        alphabet = byte_level_alphabet()
+        self.token_bytes = {
+            token_id: bytes(alphabet[character] for character in token)
+            if all(character in alphabet for character in token)
+            else token.encode()
+            for token, token_id in vocabulary.items()
+        }
+
+    def stream(self, token_ids: Iterable[int]) -> Iterator[str]:
+        """
+        Summary
+        -------
+        decode a stream of token IDs into complete UTF-8 text
+
+        Parameters
+        ----------
+        token_ids (Iterable[int])
+            the token IDs to decode
+
+        Yields
+        -------
+        text (str)
+            the text decoded so far, withholding characters whose bytes span into later tokens
+        """
+        decoder = getincrementaldecoder("utf-8")(errors="replace")
+        token_bytes = self.token_bytes
+
+        for token_id in token_ids:
+            if text := decoder.decode(token_bytes.get(token_id, b"")):
+                yield text
+
+        if text := decoder.decode(b"", final=True):
+            yield text
+
+    async def stream_async(self, token_ids: AsyncIterable[int]) -> AsyncIterator[str]:
+        """
+        Summary
+        -------
+        decode an asynchronous stream of token IDs into complete UTF-8 text
+
+        Parameters
+        ----------
+        token_ids (AsyncIterable[int])
+            the token IDs to decode
+
+        Yields
+        -------
+        text (str)
+            the text decoded so far, withholding characters whose bytes span into later tokens
+        """
+        decoder = getincrementaldecoder("utf-8")(errors="replace")
+        token_bytes = self.token_bytes
+
+        async for token_id in token_ids:
+            if text := decoder.decode(token_bytes.get(token_id, b"")):
+                yield text
+
+        if text := decoder.decode(b"", final=True):
+            yield text
@@ -0,0 +1,197 @@
+import re
+from asyncio import Task, create_task, get_running_loop, wait
+from collections.abc import AsyncIterator
+from typing import Literal
+
+from msgspec import Struct
+
+type FlushBoundary = Literal["none", "whitespace", "sentence"]
+
+BOUNDARIES: dict[FlushBoundary, re.Pattern[str]] = {
+    "whitespace": re.compile(r".*\s", re.DOTALL),
+    "sentence": re.compile(r".*(?:[.!?]\s|\n)", re.DOTALL),
+}
+
+
+class FlushPolicy(Struct, kw_only=True, frozen=True, gc=False):
+    """
+    Summary
+    -------
+    when to flush the pieces of a streamed answer as a single event, flushing every piece if no trigger is set
+
+    Attributes
+    ----------
+    max_pieces (int)
+        the number of pieces after which to flush, or `0` to disable it
+
+    max_delay (float)
+        the number of seconds after which to flush the first buffered piece, or `0` to disable it
+
+    boundary (FlushBoundary)
+        the boundary up to which to flush the buffered text whenever one is reached, or `none` to disable it
+    """
+
+    max_pieces: int = 0
+    max_delay: float = 0
+    boundary: FlushBoundary = "none"
+
+    def __bool__(self) -> bool:
+        return self.max_pieces > 1 or self.max_delay > 0 or self.boundary != "none"
+
+
+async def next_piece(pieces: AsyncIterator[str]) -> str | None:
+    """
+    Summary
+    -------
+    wait for the next piece of an answer
+
+    Parameters
+    ----------
+    pieces (AsyncIterator[str])
+        the pieces of the answer
+
+    Returns
+    -------
+    piece (str | None)
+        the next piece, or `None` if the answer is complete
+    """
+    return await anext(pieces, None)
+
+
+async def read_piece(
+    pieces: AsyncIterator[str],
+    pending: Task[str | None] | None,
+    deadline: float | None,
+) -> tuple[str | None, Task[str | None] | None]:
+    """
+    Summary
+    -------
+    wait for the next piece of an answer, giving up at a deadline on the event loop clock
+
+    Parameters
+    ----------
+    pieces (AsyncIterator[str])
+        the pieces of the answer
+
+    pending (Task[str | None] | None)
+        the unfinished read of the piece from a previous call, or `None` to start reading it
+
+    deadline (float | None)
+        the event loop time to stop waiting at, or `None` to wait for the piece
+
+    Returns
+    -------
+    piece (str | None)
+        the next piece, or `None` if the answer is complete or the deadline passed first
+
+    pending (Task[str | None] | None)
+        the unfinished read to resume if the deadline passed first, otherwise `None`
+    """
+    if pending is None and deadline is None:
+        return await next_piece(pieces), None
+
+    pending = pending or create_task(next_piece(pieces))
+
+    if deadline is not None and not (await wait((pending,), timeout=deadline - get_running_loop().time()))[0]:
+        return None, pending
+
+    return await pending, None
+
+
+def flush_end(buffer: str, buffered_pieces: int, policy: FlushPolicy, boundary: re.Pattern[str] | None) -> int:
+    """
+    Summary
+    -------
+    find how much of the buffered text to flush after a piece is buffered
+
+    Parameters
+    ----------
+    buffer (str)
+        the buffered text
+
+    buffered_pieces (int)
+        the number of pieces in the buffered text
+
+    policy (FlushPolicy)
+        when to flush the buffered pieces
+
+    boundary (re.Pattern[str] | None)
+        the pattern matching the buffered text up to its last boundary, or `None` if boundaries are disabled
+
+    Returns
+    -------
+    end (int)
+        the exclusive end index of the text to flush, or `0` to keep buffering
+    """
+    if policy.max_pieces and buffered_pieces >= policy.max_pieces:
+        return len(buffer)
+
+    if boundary is not None and (match := boundary.match(buffer)) is not None:
+        return match.end()
+
+    return 0
+
+
+async def coalesce(pieces: AsyncIterator[str], policy: FlushPolicy) -> AsyncIterator[str]:
+    """
+    Summary
+    -------
+    coalesce the pieces of a streamed answer into fewer, larger pieces
+
+    Parameters
+    ----------
+    pieces (AsyncIterator[str])
+        the pieces of the answer
+
+    policy (FlushPolicy)
+        when to flush the buffered pieces
+
+    Yields
+    -------
+    text (str)
+        the buffered text of each flush
+    """
+    if not policy:
+        async for piece in pieces:
+            yield piece
+
+        return
+
+    loop = get_running_loop()
+    boundary = BOUNDARIES.get(policy.boundary)
+    buffer = ""
+    buffered_pieces = 0
+    deadline = 0.0
+    pending: Task[str | None] | None = None
+
+    try:
+        while True:
+            piece, pending = await read_piece(pieces, pending, deadline if buffer and policy.max_delay else None)
+
+            if pending is not None:
+                yield buffer
+                buffer = ""
+                buffered_pieces = 0
+                continue
+
+            if piece is None:
+                break
+
+            if not buffer:
+                deadline = loop.time() + policy.max_delay
+
+            buffer += piece
+            buffered_pieces += 1
+
+            if end := flush_end(buffer, buffered_pieces, policy, boundary):
+                yield buffer[:end]
+                buffer = buffer[end:]
+                buffered_pieces = 1 if buffer else 0
+                deadline = loop.time() + policy.max_delay
+
+        if buffer:
+            yield buffer
+
+    finally:
+        if pending is not None:
+            pending.cancel()
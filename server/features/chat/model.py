@@ -1,20 +1,99 @@
-from collections.abc import Iterator, Sequence
-from typing import Self
+from __future__ import annotations
 
-from ctranslate2 import Generator
-from transformers.models.qwen2 import Qwen2Tokenizer
+from array import array
+from collections.abc import AsyncIterator, Callable, Iterable, Iterator, Mapping, Sequence
+from pathlib import Path
+from typing import TYPE_CHECKING, Self
 
+from anyio import to_thread
+from msgspec import Struct
+from msgspec.json import encode
+
+from server.features.chat.detokeniser import Detokeniser
+from server.features.chat.parameters import GenerationParameters, Sampling
 from server.features.chat.protocol import ChatAgentProtocol
+from server.features.chat.response_cache import ResponseCache
+from server.features.chat.scheduler import BatchScheduler
+from server.features.chat.static_prompt import EncodedStaticPrompt
+from server.features.chat.stop_sequences import StopSequences
 from server.features.chat.stub import ChatModelStub
-from server.typedefs import Event, Message
+from server.typedefs import ChatModelSpec, Event, Message, StaticPrompt
 from server.utils import huggingface_download
 
+if TYPE_CHECKING:
+    from ctranslate2 import GenerationStepResult, Generator
+    from transformers.models.qwen2 import Qwen2Tokenizer
+
 
 class QueryLengthError(Exception):
     def __init__(self) -> None:
         super().__init__("The minimum query length cannot be greater than the maximum query length!")
 
 
+class StaticPromptNotFoundError(Exception):
+    def __init__(self, name: str) -> None:
+        super().__init__(f"The static prompt '{name}' does not exist!")
+
+
+class PreparedQuery(Struct, kw_only=True, frozen=True, gc=False):
+    """
+    Summary
+    -------
+    a query encoded and checked against the response cache
+
+    Attributes
+    ----------
+    tokens (list[str])
+        the encoded query tokens CTranslate2 generates from, empty if the answer is cached
+
+    static_prompt (str)
+        the name of the static prompt preceding the query
+
+    max_tokens (int)
+        the maximum number of tokens to generate
+
+    sampling (Sampling)
+        the decoding strategy
+
+    stop (tuple[str, ...])
+        the sequences that end generation when generated
+
+    response_key (bytes)
+        the response cache key of the query
+
+    cached_answer (tuple[str, ...] | None)
+        the pieces of the cached answer, or `None` if the query has to be generated
+    """
+
+    tokens: list[str]
+    static_prompt: str
+    max_tokens: int
+    sampling: Sampling
+    stop: tuple[str, ...]
+    response_key: bytes = b""
+    cached_answer: tuple[str, ...] | None = None
+
+
+async def replay(pieces: Iterable[str]) -> AsyncIterator[str]:
+    """
+    Summary
+    -------
+    stream the pieces of a known answer
+
+    Parameters
+    ----------
+    pieces (Iterable[str])
+        the pieces of the answer
+
+    Yields
+    -------
+    answer (str)
+        the pieces of the answer
+    """
+    for piece in pieces:
+        yield piece
+
+
 class ChatModel(ChatAgentProtocol):
     """
     Summary
@@ -23,26 +102,65 @@ class ChatModel(ChatAgentProtocol):
 
     Methods
     -------
-    set_static_prompt(static_user_prompt: str, static_assistant_prompt: str) -> bool
-        set the model's static prompt
+    convert_ids_to_tokens(token_ids: array[int]) -> list[str]
+        convert token IDs into the tokens CTranslate2 generates from
+
+    set_static_prompt(name: str, static_user_prompt: str, static_assistant_prompt: str) -> bool
+        register a named static prompt
+
+    get_static_prompt(name: str | None) -> EncodedStaticPrompt
+        get a registered static prompt
+
+    encode_messages(messages: Sequence[Message], *, add_generation_prompt: bool = True) -> array[int]
+        encode text into token IDs
 
-    encode_messages(messages: Sequence[Message]) -> list[str]
-        encode text into tokens
+    prepare(messages: Sequence[Message], static_prompt: str | None, parameters: GenerationParameters | None)
+        encode a query and look up its cached answer
 
-    query(messages: Sequence[Message], cancel_event: Event) -> Iterator[str] | None
+    lookup(messages: Sequence[Message], *, static_prompt: str | None = None, ...) -> tuple[str, ...] | None
+        look up the cached answer to a query without generating it
+
+    query(messages: Sequence[Message], cancel_event: Event, *, static_prompt: str | None = None, ...)
         query the model
 
-    generate(tokens: Sequence[str]) -> Iterator[str]
-        generate text from a series/single prompt(s)
+    query_async(messages: Sequence[Message], cancel_event: Event, *, static_prompt: str | None = None, ...)
+        query the model, streaming the answer on the event loop
+
+    stream(prepared_query: PreparedQuery, cancel_event: Event) -> Iterator[str]
+        stream the answer to a query and cache it once it completes
+
+    stream_async(prepared_query: PreparedQuery, cancel_event: Event) -> AsyncIterator[str]
+        stream the answer to a query on the event loop and cache it once it completes
+
+    complete(prepared_query: PreparedQuery, pieces: list[str], cancel_event: Event) -> None
+        cache a completed answer
+
+    generate_batch(prompts: list[list[str]], static_prompt: list[str], max_length: int, sampling: Sampling, ...)
+        generate a batch of prompts, streaming each step to the callback
+
+    generate_token_ids(tokens: list[str], cancel_event: Event, static_prompt: str, *, max_tokens: int, ...)
+        generate token IDs from a prompt
+
+    generate_token_ids_async(tokens: list[str], cancel_event: Event, static_prompt: str, *, max_tokens: int, ...)
+        generate token IDs from a prompt on the event loop
+
+    generate(tokens: list[str], cancel_event: Event, static_prompt: str, *, max_tokens: int, sampling: Sampling)
+        generate text from a prompt
+
+    generate_async(tokens: list[str], cancel_event: Event, static_prompt: str, *, max_tokens: int, ...)
+        generate text from a prompt on the event loop
     """
 
     __slots__ = (
+        "detokeniser",
         "generator",
         "max_context_length",
         "max_generation_length",
         "max_query_length",
         "min_query_length",
-        "static_prompt",
+        "response_cache",
+        "scheduler",
+        "static_prompts",
         "tokeniser",
     )
 
@@ -53,6 +171,12 @@ class ChatModel(ChatAgentProtocol):
         min_query_length: int,
         max_context_length: int,
         max_generation_length: int,
+        *,
+        max_batch_size: int,
+        batch_window: float,
+        batch_workers: int,
+        response_cache_bytes: int,
+        response_cache_ttl: float,
     ) -> None:
         self.max_query_length = max_context_length - max_generation_length
 
@@ -61,46 +185,85 @@ class ChatModel(ChatAgentProtocol):
 
         self.generator = generator
         self.tokeniser = tokeniser
+        self.detokeniser = Detokeniser(tokeniser.get_vocab())
         self.min_query_length = min_query_length
         self.max_context_length = max_context_length
         self.max_generation_length = max_generation_length
-        self.static_prompt = []
+        self.static_prompts = {"": EncodedStaticPrompt(tokens=[], max_query_length=self.max_query_length)}
+        self.response_cache = ResponseCache(response_cache_bytes, response_cache_ttl)
+        self.scheduler = BatchScheduler(
+            self.generate_batch,
+            max_batch_size=max_batch_size,
+            batch_window=batch_window,
+            workers=batch_workers,
+        )
 
     def __enter__(self) -> Self:
         return self
 
     def __exit__(self, *_) -> None:
+        self.scheduler.close()
         del self.generator
         del self.tokeniser
-        del self.static_prompt
+        del self.detokeniser
+        del self.static_prompts
 
-    def encode_messages(self, messages: Sequence[Message]) -> list[str]:
+    def encode_messages(self, messages: Sequence[Message], *, add_generation_prompt: bool = True) -> array[int]:
         """
         Summary
         -------
-        encode text into tokens
+        encode text into token IDs
 
         Parameters
         ----------
         messages (Sequence[Message])
             the messages to encode
 
+        add_generation_prompt (bool)
+            whether to end the tokens with the header of an assistant message
+
+        Returns
+        -------
+        tokens (array[int])
+            the encoded token IDs
+        """
+        token_ids = self.tokeniser.apply_chat_template(
+            messages,  # pyright: ignore [reportArgumentType]
+            add_generation_prompt=add_generation_prompt,
+            tokenize=True,
+            return_dict=False,
+        )
+        return array("i", token_ids)  # pyright: ignore [reportArgumentType]
+
+    def convert_ids_to_tokens(self, token_ids: array[int]) -> list[str]:
+        """
+        Summary
+        -------
+        convert token IDs into the tokens CTranslate2 generates from
+
+        Parameters
+        ----------
+        token_ids (array[int])
+            the token IDs to convert
+
         Returns
         -------
         tokens (list[str])
-            the encoded tokens
+            the converted tokens
         """
-        prompt = self.tokeniser.apply_chat_template(messages, add_generation_prompt=True, tokenize=False)  # pyright: ignore [reportArgumentType]
-        return self.tokeniser(prompt)._encodings[0].tokens  # pyright: ignore [reportOptionalSubscript. reportAssignmentType]  # noqa: SLF001
+        return self.tokeniser.convert_ids_to_tokens(token_ids.tolist())  # pyright: ignore [reportReturnType]
 
-    def set_static_prompt(self, static_user_prompt: str, static_assistant_prompt: str) -> bool:
+    def set_static_prompt(self, name: str, static_user_prompt: str, static_assistant_prompt: str) -> bool:
         """
         Summary
         -------
-        set the model's static prompt
+        register a named static prompt
 
         Parameters
         ----------
+        name (str)
+            the name queries select the static prompt by
+
         static_user_prompt (str)
             the static user prompt
 
@@ -110,7 +273,7 @@ class ChatModel(ChatAgentProtocol):
         Returns
         -------
         success (bool)
-            whether the static prompt was set successfully
+            whether the static prompt was registered successfully
         """
         static_prompts: tuple[Message, ...] = (
             {
@@ -123,18 +286,142 @@ class ChatModel(ChatAgentProtocol):
             },
         )
 
-        static_prompt = self.encode_messages(static_prompts)
+        static_prompt = self.encode_messages(static_prompts, add_generation_prompt=False)
         max_query_length = self.max_context_length - self.max_generation_length - len(static_prompt)
 
         if max_query_length < self.min_query_length:
             return False
 
-        self.static_prompt = static_prompt
-        self.max_query_length = max_query_length
-
+        self.static_prompts[name] = EncodedStaticPrompt(
+            tokens=self.convert_ids_to_tokens(static_prompt),
+            max_query_length=max_query_length,
+        )
         return True
 
-    def query(self, messages: Sequence[Message], cancel_event: Event) -> Iterator[str] | None:
+    def get_static_prompt(self, name: str | None) -> EncodedStaticPrompt:
+        """
+        Summary
+        -------
+        get a registered static prompt
+
+        Parameters
+        ----------
+        name (str | None)
+            the name of the static prompt, or `None` for no static prompt
+
+        Returns
+        -------
+        static_prompt (EncodedStaticPrompt)
+            the encoded static prompt
+        """
+        if (static_prompt := self.static_prompts.get(name or "")) is None:
+            raise StaticPromptNotFoundError(name or "")
+
+        return static_prompt
+
+    def prepare(
+        self,
+        messages: Sequence[Message],
+        static_prompt: str | None,
+        parameters: GenerationParameters | None,
+    ) -> PreparedQuery | None:
+        """
+        Summary
+        -------
+        encode a query and look up its cached answer
+
+        Parameters
+        ----------
+        messages (Sequence[Message])
+            the messages to query the model with
+
+        static_prompt (str | None)
+            the name of the static prompt to precede the messages with
+
+        parameters (GenerationParameters | None)
+            the generation parameters, or `None` for greedy decoding up to the model's maximum length
+
+        Returns
+        -------
+        prepared_query (PreparedQuery | None)
+            the encoded query, or `None` if the query and the tokens to generate do not fit in the context
+        """
+        parameters = parameters or GenerationParameters()
+        static_prompt_name = static_prompt or ""
+        max_tokens = min(parameters.max_tokens or self.max_generation_length, self.max_generation_length)
+        max_query_length = self.get_static_prompt(static_prompt_name).max_query_length
+        sampling = parameters.sampling()
+
+        if len(tokens := self.encode_messages(messages)) > max_query_length + self.max_generation_length - max_tokens:
+            return None
+
+        response_key = b""
+        cached_answer = None
+
+        if self.response_cache and sampling.deterministic:
+            namespace = encode((static_prompt_name, max_tokens, sampling, parameters.stop)).decode()
+            response_key = self.response_cache.digest(tokens, namespace=namespace)
+            cached_answer = self.response_cache.lookup(response_key)
+
+        return PreparedQuery(
+            tokens=[] if cached_answer is not None else self.convert_ids_to_tokens(tokens),
+            static_prompt=static_prompt_name,
+            max_tokens=max_tokens,
+            sampling=sampling,
+            stop=parameters.stop,
+            response_key=response_key,
+            cached_answer=cached_answer,
+        )
+
+    def lookup(
+        self,
+        messages: Sequence[Message],
+        *,
+        static_prompt: str | None = None,
+        parameters: GenerationParameters | None = None,
+        model: str | None = None,  # noqa: ARG002
+    ) -> tuple[str, ...] | None:
+        """
+        Summary
+        -------
+        look up the cached answer to a query without generating it
+
+        Parameters
+        ----------
+        messages (Sequence[Message])
+            the messages to query the model with
+
+        static_prompt (str | None)
+            the name of the static prompt to precede the messages with
+
+        parameters (GenerationParameters | None)
+            the generation parameters, or `None` for greedy decoding up to the model's maximum length
+
+        model (str | None)
+            unused, as a chat model only serves itself
+
+        Returns
+        -------
+        answer (tuple[str, ...] | None)
+            the pieces of the cached answer, or `None` if the query has to be generated
+        """
+        if not self.response_cache or not (parameters or GenerationParameters()).sampling().deterministic:
+            return None
+
+        if (prepared_query := self.prepare(messages, static_prompt, parameters)) is None:
+            return None
+
+        return prepared_query.cached_answer
+
+    def query(
+        self,
+        messages: Sequence[Message],
+        cancel_event: Event,
+        *,
+        static_prompt: str | None = None,
+        parameters: GenerationParameters | None = None,
+        model: str | None = None,  # noqa: ARG002
+    ) -> Iterator[str] | None:
         """
         Summary
         -------
@@ -145,51 +432,442 @@ class ChatModel(ChatAgentProtocol):
         messages (Sequence[Message])
             the messages to query the model with
 
+        cancel_event (Event)
+            the event that signals the query should be cancelled
+
+        static_prompt (str | None)
+            the name of the static prompt to precede the messages with
+
+        parameters (GenerationParameters | None)
+            the generation parameters, or `None` for greedy decoding up to the model's maximum length
+
+        model (str | None)
+            unused, as a chat model only serves itself
+
         Returns
         -------
-        answer (Message | None)
+        answer (Iterator[str] | None)
             the answer to the query
         """
-        if len(tokens := self.encode_messages(messages)) > self.max_query_length:
+        if (prepared_query := self.prepare(messages, static_prompt, parameters)) is None:
             return None
 
-        return self.generate(tokens, cancel_event)
+        if prepared_query.cached_answer is not None:
+            return iter(prepared_query.cached_answer)
+
+        return self.stream(prepared_query, cancel_event)
 
-    def generate(self, tokens: list[str], cancel_event: Event) -> Iterator[str]:
+    async def query_async(
+        self,
+        messages: Sequence[Message],
+        cancel_event: Event,
+        *,
+        static_prompt: str | None = None,
+        parameters: GenerationParameters | None = None,
+        model: str | None = None,  # noqa: ARG002
+    ) -> AsyncIterator[str] | None:
         """
         Summary
         -------
-        generate text from a series/single prompt(s)
+        query the model, streaming the answer on the event loop
 
         Parameters
         ----------
-        tokens (list[str])
-            the tokens to generate text from
+        messages (Sequence[Message])
+            the messages to query the model with
+
+        cancel_event (Event)
+            the event that signals the query should be cancelled
+
+        static_prompt (str | None)
+            the name of the static prompt to precede the messages with
+
+        parameters (GenerationParameters | None)
+            the generation parameters, or `None` for greedy decoding up to the model's maximum length
+
+        model (str | None)
+            unused, as a chat model only serves itself
+
+        Returns
+        -------
+        answer (AsyncIterator[str] | None)
+            the answer to the query
+        """
+        if (prepared_query := await to_thread.run_sync(self.prepare, messages, static_prompt, parameters)) is None:
+            return None
+
+        if prepared_query.cached_answer is not None:
+            return replay(prepared_query.cached_answer)
+
+        return self.stream_async(prepared_query, cancel_event)
+
+    def stream(self, prepared_query: PreparedQuery, cancel_event: Event) -> Iterator[str]:
+        """
+        Summary
+        -------
+        stream the answer to a query and cache it once it completes
+
+        Parameters
+        ----------
+        prepared_query (PreparedQuery)
+            the encoded query
+
+        cancel_event (Event)
+            the event that signals the query should be cancelled
 
         Yields
         -------
         answer (str)
             the generated answer
         """
-        generator = self.generator.generate_tokens(
-            tokens,
-            max_length=self.max_generation_length,
-            static_prompt=self.static_prompt,
+        pieces: list[str] = []
+        answer = self.generate(
+            prepared_query.tokens,
+            cancel_event,
+            prepared_query.static_prompt,
+            max_tokens=prepared_query.max_tokens,
+            sampling=prepared_query.sampling,
         )
 
-        for result in generator:
-            if cancel_event.is_set():
+        if prepared_query.stop:
+            answer = StopSequences(prepared_query.stop).truncate(answer)
+
+        for piece in answer:
+            pieces.append(piece)
+            yield piece
+
+        self.complete(prepared_query, pieces, cancel_event)
+
+    async def stream_async(self, prepared_query: PreparedQuery, cancel_event: Event) -> AsyncIterator[str]:
+        """
+        Summary
+        -------
+        stream the answer to a query on the event loop and cache it once it completes
+
+        Parameters
+        ----------
+        prepared_query (PreparedQuery)
+            the encoded query
+
+        cancel_event (Event)
+            the event that signals the query should be cancelled
+
+        Yields
+        -------
+        answer (str)
+            the generated answer
+        """
+        pieces: list[str] = []
+        answer = self.generate_async(
+            prepared_query.tokens,
+            cancel_event,
+            prepared_query.static_prompt,
+            max_tokens=prepared_query.max_tokens,
+            sampling=prepared_query.sampling,
+        )
+
+        if prepared_query.stop:
+            answer = StopSequences(prepared_query.stop).truncate_async(answer)
+
+        async for piece in answer:
+            pieces.append(piece)
+            yield piece
+
+        self.complete(prepared_query, pieces, cancel_event)
+
+    def complete(self, prepared_query: PreparedQuery, pieces: list[str], cancel_event: Event) -> None:
+        """
+        Summary
+        -------
+        cache a completed answer
+
+        Parameters
+        ----------
+        prepared_query (PreparedQuery)
+            the encoded query
+
+        pieces (list[str])
+            the pieces of the answer
+
+        cancel_event (Event)
+            the event that signals the generation was cancelled
+        """
+        if cancel_event.is_set():
+            return
+
+        if pieces and self.response_cache and prepared_query.response_key:
+            self.response_cache.insert(prepared_query.response_key, tuple(pieces))
+
+    def generate_batch(
+        self,
+        prompts: list[list[str]],
+        static_prompt: list[str],
+        max_length: int,
+        sampling: Sampling,
+        callback: Callable[[GenerationStepResult], bool],
+    ) -> None:
+        """
+        Summary
+        -------
+        generate a batch of prompts, streaming each step to the callback
+
+        Parameters
+        ----------
+        prompts (list[list[str]])
+            the batch of prompt tokens
+
+        static_prompt (list[str])
+            the static prompt tokens shared by every prompt in the batch
+
+        max_length (int)
+            the maximum number of tokens to generate for any prompt in the batch
+
+        sampling (Sampling)
+            the decoding strategy shared by every prompt in the batch
+
+        callback (Callable[[GenerationStepResult], bool])
+            called for every generated token, returning `True` stops generation for that batch index
+        """
+        if sampling.seed is not None:
+            from ctranslate2 import set_random_seed  # noqa: PLC0415
+
+            set_random_seed(sampling.seed)
+
+        self.generator.generate_batch(
+            prompts,
+            max_length=max_length,
+            static_prompt=static_prompt,
+            include_prompt_in_result=False,
+            sampling_topk=sampling.top_k,
+            sampling_topp=sampling.top_p,
+            sampling_temperature=sampling.temperature,
+            callback=callback,
+        )
+
+    def generate_token_ids(
+        self,
+        tokens: list[str],
+        cancel_event: Event,
+        static_prompt: str,
+        *,
+        max_tokens: int,
+        sampling: Sampling,
+    ) -> Iterator[int]:
+        """
+        Summary
+        -------
+        generate token IDs from a prompt
+
+        Parameters
+        ----------
+        tokens (list[str])
+            the tokens to generate text from
+
+        cancel_event (Event)
+            the event that signals the generation should be cancelled
+
+        static_prompt (str)
+            the name of the static prompt preceding the tokens
+
+        max_tokens (int)
+            the maximum number of tokens to generate
+
+        sampling (Sampling)
+            the decoding strategy
+
+        Yields
+        -------
+        token_id (int)
+            the generated token IDs
+        """
+        for result in self.scheduler.submit(
+            tokens,
+            cancel_event,
+            static_prompt=self.get_static_prompt(static_prompt).tokens,
+            key=static_prompt,
+            max_tokens=max_tokens,
+            sampling=sampling,
+        ):
+            if cancel_event.is_set() or result.is_last:
                 break
 
-            if result.is_last:
+            yield result.token_id
+
+    async def generate_token_ids_async(
+        self,
+        tokens: list[str],
+        cancel_event: Event,
+        static_prompt: str,
+        *,
+        max_tokens: int,
+        sampling: Sampling,
+    ) -> AsyncIterator[int]:
+        """
+        Summary
+        -------
+        generate token IDs from a prompt on the event loop
+
+        Parameters
+        ----------
+        tokens (list[str])
+            the tokens to generate text from
+
+        cancel_event (Event)
+            the event that signals the generation should be cancelled
+
+        static_prompt (str)
+            the name of the static prompt preceding the tokens
+
+        max_tokens (int)
+            the maximum number of tokens to generate
+
+        sampling (Sampling)
+            the decoding strategy
+
+        Yields
+        -------
+        token_id (int)
+            the generated token IDs
+        """
+        async for result in self.scheduler.submit_async(
+            tokens,
+            cancel_event,
+            static_prompt=self.get_static_prompt(static_prompt).tokens,
+            key=static_prompt,
+            max_tokens=max_tokens,
+            sampling=sampling,
+        ):
+            if cancel_event.is_set() or result.is_last:
                 break
 
-            yield self.tokeniser.backend_tokenizer.decoder.decode((result.token,))
+            yield result.token_id
+
+    def generate(
+        self,
+        tokens: list[str],
+        cancel_event: Event,
+        static_prompt: str,
+        *,
+        max_tokens: int,
+        sampling: Sampling,
+    ) -> Iterator[str]:
+        """
+        Summary
+        -------
+        generate text from a prompt
+
+        Parameters
+        ----------
+        tokens (list[str])
+            the tokens to generate text from
+
+        cancel_event (Event)
+            the event that signals the generation should be cancelled
 
-        generator.close()
+        static_prompt (str)
+            the name of the static prompt preceding the tokens
+
+        max_tokens (int)
+            the maximum number of tokens to generate
+
+        sampling (Sampling)
+            the decoding strategy
+
+        Returns
+        -------
+        answer (Iterator[str])
+            the generated answer
+        """
+        return self.detokeniser.stream(
+            self.generate_token_ids(tokens, cancel_event, static_prompt, max_tokens=max_tokens, sampling=sampling),
+        )
+
+    def generate_async(
+        self,
+        tokens: list[str],
+        cancel_event: Event,
+        static_prompt: str,
+        *,
+        max_tokens: int,
+        sampling: Sampling,
+    ) -> AsyncIterator[str]:
+        """
+        Summary
+        -------
+        generate text from a prompt on the event loop
+
+        Parameters
+        ----------
+        tokens (list[str])
+            the tokens to generate text from
 
+        cancel_event (Event)
+            the event that signals the generation should be cancelled
 
-def get_chat_model(chat_model_threads: int, *, use_cuda: bool, stub: bool) -> ChatAgentProtocol:
+        static_prompt (str)
+            the name of the static prompt preceding the tokens
+
+        max_tokens (int)
+            the maximum number of tokens to generate
+
+        sampling (Sampling)
+            the decoding strategy
+
+        Returns
+        -------
+        answer (AsyncIterator[str])
+            the generated answer
+        """
+        token_ids = self.generate_token_ids_async(
+            tokens,
+            cancel_event,
+            static_prompt,
+            max_tokens=max_tokens,
+            sampling=sampling,
+        )
+
+        return self.detokeniser.stream_async(token_ids)
+
+
+def get_chat_model_size(model: ChatModelSpec, *, stub: bool) -> int:
+    """
+    Summary
+    -------
+    estimate the number of bytes a chat model occupies once loaded from the size of its files
+
+    Parameters
+    ----------
+    model (ChatModelSpec)
+        the chat model
+
+    stub (bool)
+        whether the model is replaced by a stub
+
+    Returns
+    -------
+    size (int)
+        the estimated number of bytes
+    """
+    if stub:
+        return 0
+
+    model_path = Path(huggingface_download(model["repository"]))
+    return sum(file.stat().st_size for file in model_path.rglob("*") if file.is_file())
+
+
+def get_chat_model(
+    model: ChatModelSpec,
+    chat_model_threads: int,
+    *,
+    intra_threads: int,
+    use_cuda: bool,
+    stub: bool,
+    max_batch_size: int,
+    batch_window: float,
+    response_cache_bytes: int,
+    response_cache_ttl: float,
+    static_prompts: Mapping[str, StaticPrompt],
+) -> ChatAgentProtocol:
     """
     Summary
     -------
@@ -197,15 +875,36 @@ def get_chat_model(chat_model_threads: int, *, use_cuda: bool, stub: bool) -> Ch
 
     Parameters
     ----------
+    model (ChatModelSpec)
+        the chat model to load
+
     chat_model_threads (int)
         the number of parallel inference threads to use for the chat model
 
+    intra_threads (int)
+        the number of threads each inference thread uses for computation, or `0` for the default
+
     use_cuda (bool)
         whether to use CUDA for inference
 
     stub (bool)
         whether to return a stub object
 
+    max_batch_size (int)
+        the maximum number of concurrent queries to generate in a single batch
+
+    batch_window (float)
+        the number of seconds to wait for more queries before generating a batch
+
+    response_cache_bytes (int)
+        the maximum number of bytes of answers to keep in the response cache, or `0` to disable it
+
+    response_cache_ttl (float)
+        the number of seconds a cached answer stays fresh for
+
+    static_prompts (Mapping[str, StaticPrompt])
+        the static prompts to encode ahead of time, keyed by the name queries select them by
+
     Returns
     -------
     model (ChatModel)
@@ -214,24 +913,39 @@ def get_chat_model(chat_model_threads: int, *, use_cuda: bool, stub: bool) -> Ch
     if stub:
         return ChatModelStub()
 
-    model_path = huggingface_download("winstxnhdw/Qwen2.5-7B-Instruct-ct2-int8")
+    from ctranslate2 import Generator  # noqa: PLC0415
+    from transformers.models.qwen2 import Qwen2Tokenizer  # noqa: PLC0415
+
+    model_path = huggingface_download(model["repository"])
     tokeniser = Qwen2Tokenizer.from_pretrained(model_path, legacy=False)
     generator = Generator(
         model_path,
         "cuda" if use_cuda else "cpu",
         compute_type="auto",
         inter_threads=chat_model_threads,
+        intra_threads=intra_threads,
         max_queued_batches=-1,
     )
 
     min_query_length = 64
-    max_context_length = 131072
+    max_context_length = model["max_context_length"]
     max_generation_length = 1024
 
-    return ChatModel(
+    chat_model = ChatModel(
         generator,
         tokeniser,  # pyright: ignore [reportUnknownArgumentType]
         min_query_length,
         max_context_length,
         max_generation_length,
+        max_batch_size=max_batch_size,
+        batch_window=batch_window,
+        batch_workers=chat_model_threads,
+        response_cache_bytes=response_cache_bytes,
+        response_cache_ttl=response_cache_ttl,
     )
+
+    for name, static_prompt in static_prompts.items():
+        if not chat_model.set_static_prompt(name, static_prompt["user"], static_prompt["assistant"]):
+            raise QueryLengthError
+
+    return chat_model
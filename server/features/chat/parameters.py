@@ -0,0 +1,98 @@
+from msgspec import Struct
+
+
+class Sampling(Struct, kw_only=True, frozen=True, gc=False):
+    """
+    Summary
+    -------
+    the decoding strategy of a query, only queries with equal strategies are batched together
+
+    Attributes
+    ----------
+    top_k (int)
+        the number of most likely tokens to sample from, `1` for greedy decoding or `0` for the full vocabulary
+
+    top_p (float)
+        the cumulative probability of the most likely tokens to sample from
+
+    temperature (float)
+        the temperature to sample with
+
+    seed (int | None)
+        the seed to sample with, or `None` for a random seed, which only makes answers reproducible on a best-effort
+        basis because the random generator is shared by every batch in the process
+    """
+
+    top_k: int = 1
+    top_p: float = 1
+    temperature: float = 1
+    seed: int | None = None
+
+    @property
+    def deterministic(self) -> bool:
+        """
+        Summary
+        -------
+        whether the same prompt always produces the same answer, which only holds for greedy decoding as seeded
+        batches share the process-wide random generator with every other batch
+
+        Returns
+        -------
+        deterministic (bool)
+            whether decoding is greedy
+        """
+        return self.top_k == 1
+
+
+GREEDY = Sampling()
+
+
+class GenerationParameters(Struct, kw_only=True, frozen=True, gc=False):
+    """
+    Summary
+    -------
+    the per-query parameters that control generation
+
+    Attributes
+    ----------
+    max_tokens (int | None)
+        the maximum number of tokens to generate, or `None` for the model's maximum
+
+    temperature (float)
+        the temperature to sample with, or `0` for greedy decoding
+
+    top_k (int)
+        the number of most likely tokens to sample from, or `0` for the full vocabulary
+
+    top_p (float)
+        the cumulative probability of the most likely tokens to sample from
+
+    stop (tuple[str, ...])
+        the sequences that end generation when generated, excluded from the answer
+
+    seed (int | None)
+        the seed to sample with, or `None` for a random seed
+    """
+
+    max_tokens: int | None = None
+    temperature: float = 0
+    top_k: int = 0
+    top_p: float = 1
+    stop: tuple[str, ...] = ()
+    seed: int | None = None
+
+    def sampling(self) -> Sampling:
+        """
+        Summary
+        -------
+        get the decoding strategy, collapsing every greedy configuration into one so that they batch together
+
+        Returns
+        -------
+        sampling (Sampling)
+            the decoding strategy
+        """
+        if not self.temperature or self.top_k == 1:
+            return GREEDY
+
+        return Sampling(top_k=self.top_k, top_p=self.top_p, temperature=self.temperature, seed=self.seed)
@@ -0,0 +1,616 @@
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Callable, Iterator, Mapping, Sequence
+from threading import Lock
+from time import monotonic
+from types import TracebackType
+from typing import Self
+from weakref import finalize
+
+from anyio import to_thread
+from opentelemetry.metrics import get_meter
+
+from server.features.chat.parameters import GenerationParameters
+from server.features.chat.protocol import ChatAgentProtocol
+from server.typedefs import ChatModelSpec, ChatModelTier, Event, Message
+
+BYTES_PER_TOKEN = 3
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+class ChatModelNotFoundError(Exception):
+    def __init__(self, name: str) -> None:
+        super().__init__(f"The chat model '{name}' does not exist!")
+
+
+def estimate_tokens(messages: Sequence[Message]) -> int:
+    """
+    Summary
+    -------
+    cheaply overestimate the number of tokens the messages encode into for most text, without tokenising them
+
+    Parameters
+    ----------
+    messages (Sequence[Message])
+        the messages
+
+    Returns
+    -------
+    tokens (int)
+        the estimated number of tokens
+    """
+    return sum(len(message["content"].encode()) // BYTES_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS for message in messages)
+
+
+class PooledModel:
+    """
+    Summary
+    -------
+    a chat model loaded into the pool
+
+    Attributes
+    ----------
+    name (str)
+        the name of the model
+
+    chat_agent (ChatAgentProtocol)
+        the loaded model
+
+    size (int)
+        the estimated number of bytes the model occupies
+
+    leases (int)
+        the number of queries using the model, which cannot be evicted while any are
+    """
+
+    __slots__ = ("chat_agent", "leases", "name", "size")
+
+    def __init__(self, name: str, chat_agent: ChatAgentProtocol, size: int) -> None:
+        self.name = name
+        self.chat_agent = chat_agent
+        self.size = size
+        self.leases = 0
+
+
+class ChatModelPool(ChatAgentProtocol):
+    """
+    Summary
+    -------
+    a registry of chat models that loads each on its first query and unloads the least recently used idle models
+    whenever loading another would exceed the memory budget, routing queries that do not select a model to the
+    smallest tier their estimated length fits and escalating them to larger tiers if they turn out to be too long
+
+    Parameters
+    ----------
+    models (Mapping[str, ChatModelSpec])
+        the models queries can select, keyed by name
+
+    default_model (str)
+        the name of the model to query when a query does not select one and there are no tiers, loaded on entry
+
+    tiers (Sequence[ChatModelTier])
+        the models to route queries that do not select one to by their estimated length
+
+    memory_budget (int)
+        the number of bytes the loaded models may occupy, or `0` for no limit
+
+    get_chat_model (Callable[[ChatModelSpec], ChatAgentProtocol])
+        the factory that loads a model
+
+    get_model_size (Callable[[ChatModelSpec], int])
+        estimate the number of bytes a model occupies once loaded
+
+    Methods
+    -------
+    lease(name: str) -> PooledModel | None
+        lease a model if it is loaded
+
+    acquire(name: str) -> PooledModel
+        lease a model, loading it and evicting idle models to make room if it is not loaded
+
+    release(model: PooledModel) -> None
+        return a leased model
+
+    evict(size: int) -> list[PooledModel]
+        remove the least recently used idle models until a model of the given size fits the budget
+
+    route(messages: Sequence[Message], model: str | None) -> list[str]
+        choose the models to try a query on, in order
+
+    lookup(messages: Sequence[Message], *, ...) -> tuple[str, ...] | None
+        look up the cached answer to a query from the model it would be routed to first, if that model is loaded
+
+    query(messages: Sequence[Message], cancel_event: Event, *, ...) -> Iterator[str] | None
+        query the selected model
+
+    query_async(messages: Sequence[Message], cancel_event: Event, *, ...) -> AsyncIterator[str] | None
+        query the selected model, streaming the answer on the event loop
+
+    stream(answer: Iterator[str], name: str, started_at: float) -> Iterator[str]
+        stream an answer and record the model's latency
+
+    stream_async(answer: AsyncIterator[str], name: str, started_at: float) -> AsyncIterator[str]
+        stream an answer on the event loop and record the model's latency
+    """
+
+    __slots__ = (
+        "default_model",
+        "duration",
+        "escalations",
+        "evictions",
+        "get_chat_model",
+        "get_model_size",
+        "load_lock",
+        "loaded",
+        "loaded_bytes",
+        "loads",
+        "lock",
+        "memory_budget",
+        "models",
+        "size",
+        "tiers",
+        "time_to_first_token",
+    )
+
+    def __init__(
+        self,
+        models: Mapping[str, ChatModelSpec],
+        *,
+        default_model: str,
+        tiers: Sequence[ChatModelTier],
+        memory_budget: int,
+        get_chat_model: Callable[[ChatModelSpec], ChatAgentProtocol],
+        get_model_size: Callable[[ChatModelSpec], int],
+    ) -> None:
+        for name in (default_model, *(tier["model"] for tier in tiers)):
+            if name not in models:
+                raise ChatModelNotFoundError(name)
+
+        meter = get_meter(__name__)
+        self.models = models
+        self.default_model = default_model
+        self.tiers = sorted(tiers, key=lambda tier: tier["max_prompt_tokens"])
+        self.memory_budget = memory_budget
+        self.get_chat_model = get_chat_model
+        self.get_model_size = get_model_size
+        self.loaded: OrderedDict[str, PooledModel] = OrderedDict()
+        self.loaded_bytes = 0
+        self.lock = Lock()
+        self.load_lock = Lock()
+        self.loads = meter.create_counter("chat.model_pool.loads", description="chat models loaded into the pool")
+        self.evictions = meter.create_counter(
+            "chat.model_pool.evictions",
+            description="chat models unloaded from the pool to make room for another",
+        )
+        self.size = meter.create_up_down_counter(
+            "chat.model_pool.bytes",
+            unit="By",
+            description="estimated bytes occupied by the chat models loaded into the pool",
+        )
+        self.escalations = meter.create_counter(
+            "chat.model_pool.escalations",
+            unit="{query}",
+            description="queries too long for the model they were routed to",
+        )
+        self.time_to_first_token = meter.create_histogram(
+            "chat.model_pool.time_to_first_token",
+            unit="s",
+            description="time from receiving a query to its model streaming the first piece of the answer",
+        )
+        self.duration = meter.create_histogram(
+            "chat.model_pool.duration",
+            unit="s",
+            description="time from receiving a query to its model finishing or abandoning the answer",
+        )
+
+    def __enter__(self) -> Self:
+        self.release(self.acquire(self.default_model))
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        with self.load_lock, self.lock:
+            for model in self.loaded.values():
+                model.chat_agent.__exit__(exc_type, exc_value, traceback)
+                self.size.add(-model.size)
+
+            self.loaded.clear()
+            self.loaded_bytes = 0
+
+    def lease(self, name: str) -> PooledModel | None:
+        """
+        Summary
+        -------
+        lease a model if it is loaded, marking it as the most recently used
+
+        Parameters
+        ----------
+        name (str)
+            the name of the model
+
+        Returns
+        -------
+        model (PooledModel | None)
+            the leased model, or `None` if it is not loaded
+        """
+        with self.lock:
+            if (model := self.loaded.get(name)) is None:
+                return None
+
+            self.loaded.move_to_end(name)
+            model.leases += 1
+
+        return model
+
+    def acquire(self, name: str) -> PooledModel:
+        """
+        Summary
+        -------
+        lease a model, loading it and evicting idle models to make room if it is not loaded
+
+        Parameters
+        ----------
+        name (str)
+            the name of the model
+
+        Returns
+        -------
+        model (PooledModel)
+            the leased model
+        """
+        if (spec := self.models.get(name)) is None:
+            raise ChatModelNotFoundError(name)
+
+        if (model := self.lease(name)) is not None:
+            return model
+
+        with self.load_lock:
+            if (model := self.lease(name)) is not None:
+                return model
+
+            size = self.get_model_size(spec)
+
+            for evicted_model in self.evict(size):
+                evicted_model.chat_agent.__exit__(None, None, None)
+
+            chat_agent = self.get_chat_model(spec)
+            chat_agent.__enter__()
+            model = PooledModel(name, chat_agent, size)
+            model.leases = 1
+
+            with self.lock:
+                self.loaded[name] = model
+                self.loaded_bytes += size
+
+            self.loads.add(1, {"model": name})
+            self.size.add(size)
+
+        return model
+
+    def release(self, model: PooledModel) -> None:
+        """
+        Summary
+        -------
+        return a leased model
+
+        Parameters
+        ----------
+        model (PooledModel)
+            the leased model
+        """
+        with self.lock:
+            model.leases -= 1
+
+    def evict(self, size: int) -> list[PooledModel]:
+        """
+        Summary
+        -------
+        remove the least recently used idle models until a model of the given size fits the budget
+
+        Parameters
+        ----------
+        size (int)
+            the number of bytes to make room for
+
+        Returns
+        -------
+        evicted_models (list[PooledModel])
+            the removed models, which the caller must unload
+        """
+        evicted_models: list[PooledModel] = []
+
+        if not self.memory_budget:
+            return evicted_models
+
+        with self.lock:
+            for model in list(self.loaded.values()):
+                if self.loaded_bytes + size <= self.memory_budget:
+                    break
+
+                if model.leases:
+                    continue
+
+                del self.loaded[model.name]
+                self.loaded_bytes -= model.size
+                evicted_models.append(model)
+
+        for model in evicted_models:
+            self.evictions.add(1, {"model": model.name})
+            self.size.add(-model.size)
+
+        return evicted_models
+
+    def route(self, messages: Sequence[Message], model: str | None) -> list[str]:
+        """
+        Summary
+        -------
+        choose the models to try a query on, in order
+
+        Parameters
+        ----------
+        messages (Sequence[Message])
+            the messages of the query
+
+        model (str | None)
+            the name of the model the query selected, or `None` to route it by its estimated length
+
+        Returns
+        -------
+        names (list[str])
+            the selected model, or every tier that fits the estimated length followed by the larger tiers
+        """
+        if model:
+            return [model]
+
+        if not self.tiers:
+            return [self.default_model]
+
+        prompt_tokens = estimate_tokens(messages)
+        names = [tier["model"] for tier in self.tiers if tier["max_prompt_tokens"] >= prompt_tokens]
+
+        return names or [self.tiers[-1]["model"]]
+
+    def lookup(
+        self,
+        messages: Sequence[Message],
+        *,
+        static_prompt: str | None = None,
+        parameters: GenerationParameters | None = None,
+        model: str | None = None,
+    ) -> tuple[str, ...] | None:
+        """
+        Summary
+        -------
+        look up the cached answer to a query from the model it would be routed to first, without loading that model
+
+        Parameters
+        ----------
+        messages (Sequence[Message])
+            the messages to query the model with
+
+        static_prompt (str | None)
+            the name of the static prompt to precede the messages with
+
+        parameters (GenerationParameters | None)
+            the generation parameters, or `None` for greedy decoding up to the model's maximum length
+
+        model (str | None)
+            the name of the model to query, or `None` to route the query by its length
+
+        Returns
+        -------
+        answer (tuple[str, ...] | None)
+            the pieces of the cached answer, or `None` if the query has to be generated
+        """
+        if (pooled_model := self.lease(self.route(messages, model)[0])) is None:
+            return None
+
+        try:
+            return pooled_model.chat_agent.lookup(messages, static_prompt=static_prompt, parameters=parameters)
+
+        finally:
+            self.release(pooled_model)
+
+    def query(
+        self,
+        messages: Sequence[Message],
+        cancel_event: Event,
+        *,
+        static_prompt: str | None = None,
+        parameters: GenerationParameters | None = None,
+        model: str | None = None,
+    ) -> Iterator[str] | None:
+        """
+        Summary
+        -------
+        query the selected or routed model, keeping it loaded until the answer is consumed or discarded
+
+        Parameters
+        ----------
+        messages (Sequence[Message])
+            the messages to query the model with
+
+        cancel_event (Event)
+            the event that signals the query should be cancelled
+
+        static_prompt (str | None)
+            the name of the static prompt to precede the messages with
+
+        parameters (GenerationParameters | None)
+            the generation parameters, or `None` for greedy decoding up to the model's maximum length
+
+        model (str | None)
+            the name of the model to query, or `None` to route the query by its length
+
+        Returns
+        -------
+        answer (Iterator[str] | None)
+            the answer to the query, or `None` if it is too long for every model it was routed to
+        """
+        started_at = monotonic()
+
+        for name in self.route(messages, model):
+            pooled_model = self.acquire(name)
+
+            try:
+                answer = pooled_model.chat_agent.query(
+                    messages,
+                    cancel_event,
+                    static_prompt=static_prompt,
+                    parameters=parameters,
+                )
+
+            except BaseException:
+                self.release(pooled_model)
+                raise
+
+            if answer is not None:
+                stream = self.stream(answer, name, started_at)
+                finalize(stream, self.release, pooled_model)
+                return stream
+
+            self.release(pooled_model)
+            self.escalations.add(1, {"model": name})
+
+        return None
+
+    async def query_async(
+        self,
+        messages: Sequence[Message],
+        cancel_event: Event,
+        *,
+        static_prompt: str | None = None,
+        parameters: GenerationParameters | None = None,
+        model: str | None = None,
+    ) -> AsyncIterator[str] | None:
+        """
+        Summary
+        -------
+        query the selected or routed model on the event loop, keeping it loaded until the answer is consumed or
+        discarded
+
+        Parameters
+        ----------
+        messages (Sequence[Message])
+            the messages to query the model with
+
+        cancel_event (Event)
+            the event that signals the query should be cancelled
+
+        static_prompt (str | None)
+            the name of the static prompt to precede the messages with
+
+        parameters (GenerationParameters | None)
+            the generation parameters, or `None` for greedy decoding up to the model's maximum length
+
+        model (str | None)
+            the name of the model to query, or `None` to route the query by its length
+
+        Returns
+        -------
+        answer (AsyncIterator[str] | None)
+            the answer to the query, or `None` if it is too long for every model it was routed to
+        """
+        started_at = monotonic()
+
+        for name in self.route(messages, model):
+            if (pooled_model := self.lease(name)) is None:
+                pooled_model = await to_thread.run_sync(self.acquire, name)
+
+            try:
+                answer = await pooled_model.chat_agent.query_async(
+                    messages,
+                    cancel_event,
+                    static_prompt=static_prompt,
+                    parameters=parameters,
+                )
+
+            except BaseException:
+                self.release(pooled_model)
+                raise
+
+            if answer is not None:
+                stream = self.stream_async(answer, name, started_at)
+                finalize(stream, self.release, pooled_model)
+                return stream
+
+            self.release(pooled_model)
+            self.escalations.add(1, {"model": name})
+
+        return None
+
+    def stream(self, answer: Iterator[str], name: str, started_at: float) -> Iterator[str]:
+        """
+        Summary
+        -------
+        stream an answer and record the model's latency, in a generator whose collection returns the model's lease
+
+        Parameters
+        ----------
+        answer (Iterator[str])
+            the answer to stream
+
+        name (str)
+            the name of the model generating the answer
+
+        started_at (float)
+            the monotonic time at which the query was received
+
+        Yields
+        -------
+        piece (str)
+            the next piece of the answer
+        """
+        attributes = {"model": name}
+        first_piece = True
+
+        try:
+            for piece in answer:
+                if first_piece:
+                    self.time_to_first_token.record(monotonic() - started_at, attributes)
+                    first_piece = False
+
+                yield piece
+
+        finally:
+            self.duration.record(monotonic() - started_at, attributes)
+
+    async def stream_async(self, answer: AsyncIterator[str], name: str, started_at: float) -> AsyncIterator[str]:
+        """
+        Summary
+        -------
+        stream an answer on the event loop and record the model's latency, in a generator whose collection returns
+        the model's lease
+
+        Parameters
+        ----------
+        answer (AsyncIterator[str])
+            the answer to stream
+
+        name (str)
+            the name of the model generating the answer
+
+        started_at (float)
+            the monotonic time at which the query was received
+
+        Yields
+        -------
+        piece (str)
+            the next piece of the answer
+        """
+        attributes = {"model": name}
+        first_piece = True
+
+        try:
+            async for piece in answer:
+                if first_piece:
+                    self.time_to_first_token.record(monotonic() - started_at, attributes)
+                    first_piece = False
+
+                yield piece
+
+        finally:
+            self.duration.record(monotonic() - started_at, attributes)
@@ -1,7 +1,8 @@
-from collections.abc import Iterator, Sequence
+from collections.abc import AsyncIterator, Iterator, Sequence
 from types import TracebackType
 from typing import Protocol, Self
 
+from server.features.chat.parameters import GenerationParameters
 from server.typedefs import Event, Message
 
 
@@ -13,8 +14,14 @@ class ChatAgentProtocol(Protocol):
 
     Methods
     -------
-    query(messages: Sequence[Message], cancel_event: Event) -> Iterator[str] | None
+    lookup(messages: Sequence[Message], *, static_prompt: str | None = None, ...) -> tuple[str, ...] | None
+        look up the cached answer to a query without generating it
+
+    query(messages: Sequence[Message], cancel_event: Event, *, static_prompt: str | None = None, ...)
         query the model
+
+    query_async(messages: Sequence[Message], cancel_event: Event, *, static_prompt: str | None = None, ...)
+        query the model, streaming the answer on the event loop
     """
 
     def __enter__(self) -> Self: ...
@@ -24,4 +31,29 @@ class ChatAgentProtocol(Protocol):
         exc_value: BaseException | None,
         traceback: TracebackType | None,
     ) -> None: ...
-    def query(self, messages: Sequence[Message], cancel_event: Event) -> Iterator[str] | None: ...
+    def lookup(
+        self,
+        messages: Sequence[Message],
+        *,
+        static_prompt: str | None = None,
+        parameters: GenerationParameters | None = None,
+        model: str | None = None,
+    ) -> tuple[str, ...] | None: ...
+    def query(
+        self,
+        messages: Sequence[Message],
+        cancel_event: Event,
+        *,
+        static_prompt: str | None = None,
+        parameters: GenerationParameters | None = None,
+        model: str | None = None,
+    ) -> Iterator[str] | None: ...
+    async def query_async(
+        self,
+        messages: Sequence[Message],
+        cancel_event: Event,
+        *,
+        static_prompt: str | None = None,
+        parameters: GenerationParameters | None = None,
+        model: str | None = None,
+    ) -> AsyncIterator[str] | None: ...
@@ -0,0 +1,180 @@
+from collections.abc import Callable
+from multiprocessing import get_context
+from multiprocessing.connection import Connection, Listener
+from multiprocessing.process import BaseProcess
+from multiprocessing.synchronize import Event as ProcessEvent
+from os import sched_getaffinity, sched_setaffinity
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from threading import Event, Thread
+from types import TracebackType
+from typing import Literal
+
+from server.features.chat.model import StaticPromptNotFoundError
+from server.features.chat.pool import ChatModelNotFoundError
+from server.features.chat.protocol import ChatAgentProtocol
+
+type ReplicaStatus = Literal["accepted", "query_too_long", "static_prompt_not_found", "model_not_found"]
+
+
+class ReplicaStartError(Exception):
+    def __init__(self, name: str) -> None:
+        super().__init__(f"The chat model replica '{name}' exited before it was ready!")
+
+
+def serve_connection(chat_model: ChatAgentProtocol, connection: Connection) -> None:
+    """
+    Summary
+    -------
+    answer a single query received over a replica connection
+
+    Parameters
+    ----------
+    chat_model (ChatAgentProtocol)
+        the chat model hosted by the replica
+
+    connection (Connection)
+        the connection to the client
+    """
+    cancel_event = Event()
+
+    with connection:
+        try:
+            messages, static_prompt, parameters, model = connection.recv()
+
+            try:
+                answer = chat_model.query(
+                    messages,
+                    cancel_event,
+                    static_prompt=static_prompt,
+                    parameters=parameters,
+                    model=model,
+                )
+
+            except StaticPromptNotFoundError:
+                connection.send("static_prompt_not_found")
+                return
+
+            except ChatModelNotFoundError:
+                connection.send("model_not_found")
+                return
+
+            if answer is None:
+                connection.send("query_too_long")
+                return
+
+            connection.send("accepted")
+
+            for piece in answer:
+                connection.send(piece)
+
+            connection.send(None)
+
+        except EOFError, OSError:
+            cancel_event.set()
+
+
+def serve_chat_replica(
+    get_chat_model: Callable[[], ChatAgentProtocol],
+    address: str,
+    cores: set[int],
+    ready: ProcessEvent,
+) -> None:
+    """
+    Summary
+    -------
+    host a chat model pinned to a set of cores and answer queries from the server workers
+
+    Parameters
+    ----------
+    get_chat_model (Callable[[], ChatAgentProtocol])
+        a picklable factory for the chat model
+
+    address (str)
+        the Unix socket address to listen on
+
+    cores (set[int])
+        the cores to pin the replica to
+
+    ready (ProcessEvent)
+        the event to set once the replica is accepting connections
+    """
+    sched_setaffinity(0, cores)
+
+    with get_chat_model() as chat_model, Listener(address, family="AF_UNIX") as listener:
+        ready.set()
+
+        while True:
+            Thread(target=serve_connection, args=(chat_model, listener.accept()), daemon=True).start()
+
+
+class ChatReplicaPool:
+    """
+    Summary
+    -------
+    a context manager that spawns chat model replicas, each pinned to its own contiguous set of cores
+
+    Parameters
+    ----------
+    replicas (int)
+        the number of replicas to spawn
+
+    get_chat_model (Callable[[], ChatAgentProtocol])
+        a picklable factory for the chat model of each replica
+    """
+
+    __slots__ = ("directory", "get_chat_model", "processes", "replicas")
+
+    def __init__(self, replicas: int, get_chat_model: Callable[[], ChatAgentProtocol]) -> None:
+        self.replicas = replicas
+        self.get_chat_model = get_chat_model
+        self.directory = TemporaryDirectory(prefix="llm-api-")
+        self.processes: list[BaseProcess] = []
+
+    def __enter__(self) -> list[str]:
+        if not self.replicas:
+            return []
+
+        context = get_context("spawn")
+        cores = sorted(sched_getaffinity(0))
+        addresses: list[str] = []
+        pending: list[tuple[BaseProcess, ProcessEvent]] = []
+
+        for index in range(self.replicas):
+            address = str(Path(self.directory.name) / f"chat-{index}.sock")
+            core_set = set(cores[index * len(cores) // self.replicas : (index + 1) * len(cores) // self.replicas])
+            ready = context.Event()
+            process = context.Process(
+                target=serve_chat_replica,
+                args=(self.get_chat_model, address, core_set or set(cores), ready),
+                name=f"chat-replica-{index}",
+                daemon=True,
+            )
+
+            process.start()
+            self.processes.append(process)
+            addresses.append(address)
+            pending.append((process, ready))
+
+        for process, ready in pending:
+            while not ready.wait(1):
+                if not process.is_alive():
+                    self.__exit__(None, None, None)
+                    raise ReplicaStartError(process.name)
+
+        return addresses
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        for process in self.processes:
+            process.terminate()
+
+        for process in self.processes:
+            process.join()
+
+        self.processes.clear()
+        self.directory.cleanup()
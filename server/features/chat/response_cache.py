@@ -0,0 +1,194 @@
+from array import array
+from collections import OrderedDict
+from hashlib import blake2b
+from threading import Lock
+from time import monotonic
+
+from msgspec import Struct
+from opentelemetry.metrics import get_meter
+
+
+class CachedResponse(Struct, kw_only=True, frozen=True, gc=False):
+    """
+    Summary
+    -------
+    a cached answer, kept as the pieces it was streamed in
+
+    Attributes
+    ----------
+    pieces (tuple[str, ...])
+        the pieces of the answer
+
+    size (int)
+        the number of bytes of the answer
+
+    expires_at (float)
+        the monotonic time after which the answer is stale
+    """
+
+    pieces: tuple[str, ...]
+    size: int
+    expires_at: float
+
+
+class ResponseCache:
+    """
+    Summary
+    -------
+    a byte-budgeted LRU cache of answers with a time-to-live, keyed on the exact prompt and generation parameters
+
+    Parameters
+    ----------
+    max_bytes (int)
+        the maximum number of bytes of answers to keep, or `0` to disable the cache
+
+    ttl (float)
+        the number of seconds an answer stays fresh for
+
+    Methods
+    -------
+    digest(tokens: array[int], *, namespace: str) -> bytes
+        hash a prompt
+
+    evict(key: bytes) -> int
+        remove an answer from the cache
+
+    lookup(key: bytes) -> tuple[str, ...] | None
+        find the fresh answer to a prompt
+
+    insert(key: bytes, pieces: tuple[str, ...]) -> None
+        cache an answer, evicting the least recently used answers beyond the budget
+    """
+
+    __slots__ = ("cached_bytes", "entries", "hits", "lock", "max_bytes", "misses", "size", "ttl")
+
+    def __init__(self, max_bytes: int, ttl: float) -> None:
+        meter = get_meter(__name__)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.cached_bytes = 0
+        self.entries: OrderedDict[bytes, CachedResponse] = OrderedDict()
+        self.lock = Lock()
+        self.hits = meter.create_counter("chat.response_cache.hits", description="response cache hits")
+        self.misses = meter.create_counter("chat.response_cache.misses", description="response cache misses")
+        self.size = meter.create_up_down_counter(
+            "chat.response_cache.size",
+            unit="By",
+            description="bytes of answers held by the response cache",
+        )
+
+    def __bool__(self) -> bool:
+        return self.max_bytes > 0
+
+    def digest(self, tokens: array[int], *, namespace: str) -> bytes:
+        """
+        Summary
+        -------
+        hash a prompt
+
+        Parameters
+        ----------
+        tokens (array[int])
+            the token IDs of the prompt
+
+        namespace (str)
+            the static prompt and generation parameters the answer depends on
+
+        Returns
+        -------
+        digest (bytes)
+            the digest of the prompt
+        """
+        hasher = blake2b(digest_size=16)
+        hasher.update(namespace.encode())
+        hasher.update(b"\0")
+        hasher.update(memoryview(tokens))
+
+        return hasher.digest()
+
+    def evict(self, key: bytes) -> int:
+        """
+        Summary
+        -------
+        remove an answer from the cache, the lock must be held
+
+        Parameters
+        ----------
+        key (bytes)
+            the key of the answer
+
+        Returns
+        -------
+        size (int)
+            the number of bytes freed
+        """
+        size = self.entries.pop(key).size
+        self.cached_bytes -= size
+
+        return size
+
+    def lookup(self, key: bytes) -> tuple[str, ...] | None:
+        """
+        Summary
+        -------
+        find the fresh answer to a prompt
+
+        Parameters
+        ----------
+        key (bytes)
+            the digest of the prompt
+
+        Returns
+        -------
+        pieces (tuple[str, ...] | None)
+            the pieces of the answer, or `None` if there is no fresh answer
+        """
+        freed = 0
+
+        with self.lock:
+            if (entry := self.entries.get(key)) is not None and entry.expires_at <= monotonic():
+                freed = self.evict(key)
+                entry = None
+
+            if entry is not None:
+                self.entries.move_to_end(key)
+
+        if freed:
+            self.size.add(-freed)
+
+        if entry is None:
+            self.misses.add(1)
+            return None
+
+        self.hits.add(1)
+        return entry.pieces
+
+    def insert(self, key: bytes, pieces: tuple[str, ...]) -> None:
+        """
+        Summary
+        -------
+        cache an answer, evicting the least recently used answers beyond the budget
+
+        Parameters
+        ----------
+        key (bytes)
+            the digest of the prompt
+
+        pieces (tuple[str, ...])
+            the pieces of the answer
+        """
+        size = sum(len(piece.encode()) for piece in pieces)
+
+        if size > self.max_bytes:
+            return
+
+        with self.lock:
+            resized = -self.evict(key) if key in self.entries else 0
+            self.entries[key] = CachedResponse(pieces=pieces, size=size, expires_at=monotonic() + self.ttl)
+            self.cached_bytes += size
+            resized += size
+
+            while self.cached_bytes > self.max_bytes:
+                resized -= self.evict(next(iter(self.entries)))
+
+        self.size.add(resized)
@@ -0,0 +1,370 @@
+from asyncio import StreamReader, StreamWriter, open_unix_connection
+from collections.abc import AsyncIterator, Iterator, Sequence
+from multiprocessing.connection import Client, Connection
+from pickle import dumps, loads
+from struct import pack, unpack
+from threading import Lock
+from typing import Self
+
+from server.features.chat.model import StaticPromptNotFoundError
+from server.features.chat.parameters import GenerationParameters
+from server.features.chat.pool import ChatModelNotFoundError
+from server.features.chat.protocol import ChatAgentProtocol
+from server.features.chat.replica import ReplicaStatus
+from server.typedefs import Event, Message
+
+
+def write_message(writer: StreamWriter, message: object) -> None:
+    """
+    Summary
+    -------
+    write a message in the framing of `multiprocessing.connection.Connection.send`
+
+    Parameters
+    ----------
+    writer (StreamWriter)
+        the stream to write to
+
+    message (object)
+        the message to write
+    """
+    payload = dumps(message)
+    writer.write(pack("!i", len(payload)) + payload)
+
+
+async def read_message(reader: StreamReader) -> object:
+    """
+    Summary
+    -------
+    read a message in the framing of `multiprocessing.connection.Connection.recv`
+
+    Parameters
+    ----------
+    reader (StreamReader)
+        the stream to read from
+
+    Returns
+    -------
+    message (object)
+        the message read
+    """
+    (size,) = unpack("!i", await reader.readexactly(4))
+
+    if size == -1:
+        (size,) = unpack("!Q", await reader.readexactly(8))
+
+    return loads(await reader.readexactly(size))  # noqa: S301
+
+
+class ChatReplicaRouter(ChatAgentProtocol):
+    """
+    Summary
+    -------
+    a chat agent that forwards queries to the least loaded chat model replica
+
+    Methods
+    -------
+    acquire() -> int
+        reserve the least loaded replica
+
+    release(index: int) -> None
+        release a reserved replica
+
+    lookup(messages: Sequence[Message], *, static_prompt: str | None = None, ...) -> tuple[str, ...] | None
+        look up the cached answer to a query, which only the replicas can do
+
+    query(messages: Sequence[Message], cancel_event: Event, *, static_prompt: str | None = None, ...)
+        query a replica
+
+    stream(index: int, connection: Connection, cancel_event: Event) -> Iterator[str]
+        stream an answer from a replica
+
+    query_async(messages: Sequence[Message], cancel_event: Event, *, static_prompt: str | None = None, ...)
+        query a replica without blocking the event loop
+
+    stream_async(index: int, reader: StreamReader, writer: StreamWriter, cancel_event: Event) -> AsyncIterator[str]
+        stream an answer from a replica on the event loop
+    """
+
+    __slots__ = ("addresses", "loads", "lock")
+
+    def __init__(self, addresses: Sequence[str]) -> None:
+        self.addresses = addresses
+        self.loads = [0] * len(addresses)
+        self.lock = Lock()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *_) -> None:
+        return
+
+    def acquire(self) -> int:
+        """
+        Summary
+        -------
+        reserve the least loaded replica
+
+        Returns
+        -------
+        index (int)
+            the index of the reserved replica
+        """
+        with self.lock:
+            index = min(range(len(self.loads)), key=self.loads.__getitem__)
+            self.loads[index] += 1
+
+        return index
+
+    def release(self, index: int) -> None:
+        """
+        Summary
+        -------
+        release a reserved replica
+
+        Parameters
+        ----------
+        index (int)
+            the index of the reserved replica
+        """
+        with self.lock:
+            self.loads[index] -= 1
+
+    def lookup(
+        self,
+        messages: Sequence[Message],  # noqa: ARG002
+        *,
+        static_prompt: str | None = None,  # noqa: ARG002
+        parameters: GenerationParameters | None = None,  # noqa: ARG002
+        model: str | None = None,  # noqa: ARG002
+    ) -> tuple[str, ...] | None:
+        """
+        Summary
+        -------
+        look up the cached answer to a query, which only the replicas can do as each keeps its own response cache
+
+        Parameters
+        ----------
+        messages (Sequence[Message])
+            the messages to query the model with
+
+        static_prompt (str | None)
+            the name of the static prompt to precede the messages with
+
+        parameters (GenerationParameters | None)
+            the generation parameters, or `None` for greedy decoding up to the model's maximum length
+
+        model (str | None)
+            the name of the model to query, or `None` for the default model
+
+        Returns
+        -------
+        answer (None)
+            always `None`, so the query is answered by a replica
+        """
+        return None
+
+    def query(
+        self,
+        messages: Sequence[Message],
+        cancel_event: Event,
+        *,
+        static_prompt: str | None = None,
+        parameters: GenerationParameters | None = None,
+        model: str | None = None,
+    ) -> Iterator[str] | None:
+        """
+        Summary
+        -------
+        query a replica
+
+        Parameters
+        ----------
+        messages (Sequence[Message])
+            the messages to query the model with
+
+        cancel_event (Event)
+            the event that signals the query should be cancelled
+
+        static_prompt (str | None)
+            the name of the static prompt to precede the messages with
+
+        parameters (GenerationParameters | None)
+            the generation parameters, or `None` for greedy decoding up to the model's maximum length
+
+        model (str | None)
+            the name of the model to query, or `None` for the default model
+
+        Returns
+        -------
+        answer (Iterator[str] | None)
+            the answer to the query
+        """
+        index = self.acquire()
+
+        try:
+            connection = Client(self.addresses[index], family="AF_UNIX")
+
+        except BaseException:
+            self.release(index)
+            raise
+
+        try:
+            connection.send((list(messages), static_prompt, parameters, model))
+            status: ReplicaStatus = connection.recv()
+
+        except BaseException:
+            connection.close()
+            self.release(index)
+            raise
+
+        if status == "accepted":
+            return self.stream(index, connection, cancel_event)
+
+        connection.close()
+        self.release(index)
+
+        if status == "static_prompt_not_found":
+            raise StaticPromptNotFoundError(static_prompt or "")
+
+        if status == "model_not_found":
+            raise ChatModelNotFoundError(model or "")
+
+        return None
+
+    def stream(self, index: int, connection: Connection, cancel_event: Event) -> Iterator[str]:
+        """
+        Summary
+        -------
+        stream an answer from a replica, closing the connection to cancel the query
+
+        Parameters
+        ----------
+        index (int)
+            the index of the reserved replica
+
+        connection (Connection)
+            the connection to the replica
+
+        cancel_event (Event)
+            the event that signals the query should be cancelled
+
+        Yields
+        -------
+        answer (str)
+            the generated answer
+        """
+        try:
+            while not cancel_event.is_set() and (piece := connection.recv()) is not None:
+                yield piece
+
+        finally:
+            connection.close()
+            self.release(index)
+
+    async def query_async(
+        self,
+        messages: Sequence[Message],
+        cancel_event: Event,
+        *,
+        static_prompt: str | None = None,
+        parameters: GenerationParameters | None = None,
+        model: str | None = None,
+    ) -> AsyncIterator[str] | None:
+        """
+        Summary
+        -------
+        query a replica without blocking the event loop
+
+        Parameters
+        ----------
+        messages (Sequence[Message])
+            the messages to query the model with
+
+        cancel_event (Event)
+            the event that signals the query should be cancelled
+
+        static_prompt (str | None)
+            the name of the static prompt to precede the messages with
+
+        parameters (GenerationParameters | None)
+            the generation parameters, or `None` for greedy decoding up to the model's maximum length
+
+        model (str | None)
+            the name of the model to query, or `None` for the default model
+
+        Returns
+        -------
+        answer (AsyncIterator[str] | None)
+            the answer to the query
+        """
+        index = self.acquire()
+
+        try:
+            reader, writer = await open_unix_connection(self.addresses[index])
+
+        except BaseException:
+            self.release(index)
+            raise
+
+        try:
+            write_message(writer, (list(messages), static_prompt, parameters, model))
+            status: ReplicaStatus = await read_message(reader)  # pyright: ignore [reportAssignmentType]
+
+        except BaseException:
+            writer.close()
+            self.release(index)
+            raise
+
+        if status == "accepted":
+            return self.stream_async(index, reader, writer, cancel_event)
+
+        writer.close()
+        self.release(index)
+
+        if status == "static_prompt_not_found":
+            raise StaticPromptNotFoundError(static_prompt or "")
+
+        if status == "model_not_found":
+            raise ChatModelNotFoundError(model or "")
+
+        return None
+
+    async def stream_async(
+        self,
+        index: int,
+        reader: StreamReader,
+        writer: StreamWriter,
+        cancel_event: Event,
+    ) -> AsyncIterator[str]:
+        """
+        Summary
+        -------
+        stream an answer from a replica on the event loop, closing the connection to cancel the query
+
+        Parameters
+        ----------
+        index (int)
+            the index of the reserved replica
+
+        reader (StreamReader)
+            the stream to read the answer from
+
+        writer (StreamWriter)
+            the stream to the replica
+
+        cancel_event (Event)
+            the event that signals the query should be cancelled
+
+        Yields
+        -------
+        answer (str)
+            the generated answer
+        """
+        try:
+            while not cancel_event.is_set() and (piece := await read_message(reader)) is not None:
+                yield piece  # pyright: ignore [reportReturnType]
+
+        finally:
+            writer.close()
+            self.release(index)
@@ -0,0 +1,499 @@
+from __future__ import annotations
+
+from asyncio import Queue, get_running_loop
+from collections import deque
+from collections.abc import AsyncIterator, Callable, Hashable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from functools import partial
+from logging import getLogger
+from queue import Empty, SimpleQueue
+from threading import Semaphore, Thread
+from time import monotonic
+from typing import TYPE_CHECKING
+
+from server.typedefs import Event
+
+if TYPE_CHECKING:
+    from ctranslate2 import GenerationStepResult
+
+    from server.features.chat.parameters import Sampling
+
+type BatchGenerator = Callable[
+    [list[list[str]], list[str], int, Sampling, Callable[[GenerationStepResult], bool]],
+    object,
+]
+type QueryResult = GenerationStepResult | Exception | None
+
+logger = getLogger(__name__)
+
+
+class LoopQueue[T]:
+    """
+    Summary
+    -------
+    a queue that can be put to from any thread and is consumed on the event loop that created it
+
+    Methods
+    -------
+    put(item: T) -> None
+        enqueue an item without blocking the calling thread
+
+    get() -> T
+        wait for the next item
+    """
+
+    __slots__ = ("loop", "queue")
+
+    def __init__(self) -> None:
+        self.loop = get_running_loop()
+        self.queue: Queue[T] = Queue()
+
+    def put(self, item: T) -> None:
+        """
+        Summary
+        -------
+        enqueue an item without blocking the calling thread, dropping it if the event loop has been closed
+
+        Parameters
+        ----------
+        item (T)
+            the item to enqueue
+        """
+        with suppress(RuntimeError):
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, item)
+
+    async def get(self) -> T:
+        """
+        Summary
+        -------
+        wait for the next item
+
+        Returns
+        -------
+        item (T)
+            the next item
+        """
+        return await self.queue.get()
+
+
+class PendingQuery:
+    """
+    Summary
+    -------
+    a query waiting to be scheduled into a batch
+
+    Methods
+    -------
+    batches_with(query: PendingQuery) -> bool
+        whether the query can share a batch with another query
+
+    Attributes
+    ----------
+    prompt (list[str])
+        the prompt tokens
+
+    static_prompt (list[str])
+        the static prompt tokens that precede the prompt
+
+    key (Hashable)
+        the key identifying the static prompt, only queries with equal keys are batched together
+
+    sampling (Sampling)
+        the decoding strategy, only queries with equal strategies are batched together
+
+    remaining_tokens (int)
+        the number of tokens left to generate for this query
+
+    cancel_event (Event)
+        the event that signals the query should be cancelled
+
+    results (SimpleQueue[QueryResult] | LoopQueue[QueryResult])
+        the generation steps for this query, terminated by `None` or by the exception that failed its batch
+
+    closed (bool)
+        whether the query no longer needs generation steps
+    """
+
+    __slots__ = (
+        "cancel_event",
+        "closed",
+        "key",
+        "prompt",
+        "remaining_tokens",
+        "results",
+        "sampling",
+        "static_prompt",
+    )
+
+    def __init__(
+        self,
+        prompt: list[str],
+        static_prompt: list[str],
+        key: Hashable,
+        cancel_event: Event,
+        results: SimpleQueue[QueryResult] | LoopQueue[QueryResult],
+        *,
+        max_tokens: int,
+        sampling: Sampling,
+    ) -> None:
+        self.prompt = prompt
+        self.static_prompt = static_prompt
+        self.key = key
+        self.sampling = sampling
+        self.remaining_tokens = max_tokens
+        self.cancel_event = cancel_event
+        self.results = results
+        self.closed = False
+
+    def batches_with(self, query: PendingQuery) -> bool:
+        """
+        Summary
+        -------
+        whether the query can share a batch with another query
+
+        Parameters
+        ----------
+        query (PendingQuery)
+            the other query
+
+        Returns
+        -------
+        batchable (bool)
+            whether both queries share a static prompt and a decoding strategy
+        """
+        return self.key == query.key and self.sampling == query.sampling
+
+
+class BatchScheduler:
+    """
+    Summary
+    -------
+    a scheduler that coalesces concurrent queries into a single batched generation
+
+    Methods
+    -------
+    submit(prompt: list[str], cancel_event: Event, *, static_prompt: list[str], key: Hashable, ...)
+        schedule a prompt and stream back its generation steps
+
+    submit_async(prompt: list[str], cancel_event: Event, *, static_prompt: list[str], key: Hashable, ...)
+        schedule a prompt and stream back its generation steps on the event loop
+
+    close() -> None
+        stop accepting queries and wait for the running batches to finish
+    """
+
+    __slots__ = ("batch_window", "executor", "generate", "max_batch_size", "pending", "slots", "worker")
+
+    def __init__(
+        self,
+        generate: BatchGenerator,
+        *,
+        max_batch_size: int,
+        batch_window: float,
+        workers: int,
+    ) -> None:
+        self.generate = generate
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window
+        self.pending: SimpleQueue[PendingQuery | None] = SimpleQueue()
+        self.slots = Semaphore(workers)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch-scheduler")
+        self.worker = Thread(target=self.collect, name="batch-collector", daemon=True)
+        self.worker.start()
+
+    def collect_batch(
+        self,
+        query: PendingQuery,
+        deferred: deque[PendingQuery],
+    ) -> tuple[list[PendingQuery], bool]:
+        """
+        Summary
+        -------
+        collect queries batchable with the first query that arrive within its batch window
+
+        Parameters
+        ----------
+        query (PendingQuery)
+            the first query of the batch
+
+        deferred (deque[PendingQuery])
+            queries with a different static prompt or decoding strategy, left for a later batch
+
+        Returns
+        -------
+        batch (list[PendingQuery])
+            the collected batch
+
+        closed (bool)
+            whether the scheduler was closed while collecting
+        """
+        batch = [query]
+        remaining: deque[PendingQuery] = deque()
+
+        for deferred_query in deferred:
+            if deferred_query.batches_with(query) and len(batch) < self.max_batch_size:
+                batch.append(deferred_query)
+            else:
+                remaining.append(deferred_query)
+
+        deferred.clear()
+        deferred.extend(remaining)
+        deadline = monotonic() + self.batch_window
+
+        while len(batch) < self.max_batch_size and (timeout := deadline - monotonic()) > 0:
+            try:
+                next_query = self.pending.get(timeout=timeout)
+
+            except Empty:
+                break
+
+            if next_query is None:
+                return batch, True
+
+            if next_query.batches_with(query):
+                batch.append(next_query)
+            else:
+                deferred.append(next_query)
+
+        return batch, False
+
+    def collect(self) -> None:
+        """
+        Summary
+        -------
+        continuously collect pending queries into batches, waiting for a free worker before collecting each batch so
+        that queries arriving while every worker is busy are coalesced into the next batch
+        """
+        deferred: deque[PendingQuery] = deque()
+        closed = False
+
+        while not closed or deferred:
+            if (query := deferred.popleft() if deferred else self.pending.get()) is None:
+                closed = True
+                continue
+
+            self.slots.acquire()
+            batch, batch_closed = self.collect_batch(query, deferred)
+            closed = closed or batch_closed
+            active_batch: list[PendingQuery] = []
+
+            for pending_query in batch:
+                if pending_query.cancel_event.is_set():
+                    pending_query.results.put(None)
+                else:
+                    active_batch.append(pending_query)
+
+            if active_batch:
+                self.executor.submit(self.run_batch, active_batch)
+            else:
+                self.slots.release()
+
+    def dispatch(self, batch: list[PendingQuery], step: GenerationStepResult) -> bool:
+        """
+        Summary
+        -------
+        route a generation step back to the query it belongs to, ending the query once it runs out of tokens
+
+        Parameters
+        ----------
+        batch (list[PendingQuery])
+            the batch being generated
+
+        step (GenerationStepResult)
+            the generation step
+
+        Returns
+        -------
+        stop (bool)
+            whether generation should stop for this batch index
+        """
+        query = batch[step.batch_id]
+
+        if query.closed:
+            return True
+
+        if query.cancel_event.is_set():
+            query.closed = True
+            query.results.put(None)
+            return True
+
+        query.results.put(step)
+        query.remaining_tokens -= 1
+
+        if query.remaining_tokens > 0:
+            return False
+
+        query.closed = True
+        query.results.put(None)
+        return True
+
+    def run_batch(self, batch: list[PendingQuery]) -> None:
+        """
+        Summary
+        -------
+        generate a batch of queries, signalling every query once the batch is done or failing every query with the
+        exception that ended the batch
+
+        Parameters
+        ----------
+        batch (list[PendingQuery])
+            the batch to generate
+        """
+        try:
+            self.generate(
+                [query.prompt for query in batch],
+                batch[0].static_prompt,
+                max(query.remaining_tokens for query in batch) + 1,
+                batch[0].sampling,
+                partial(self.dispatch, batch),
+            )
+
+        except Exception as exception:
+            logger.exception("Failed to generate a batch of %d queries", len(batch))
+
+            for query in batch:
+                if not query.closed:
+                    query.closed = True
+                    query.results.put(exception)
+
+        finally:
+            self.slots.release()
+
+            for query in batch:
+                if not query.closed:
+                    query.results.put(None)
+
+    def submit(
+        self,
+        prompt: list[str],
+        cancel_event: Event,
+        *,
+        static_prompt: list[str],
+        key: Hashable,
+        max_tokens: int,
+        sampling: Sampling,
+    ) -> Iterator[GenerationStepResult]:
+        """
+        Summary
+        -------
+        schedule a prompt and stream back its generation steps
+
+        Parameters
+        ----------
+        prompt (list[str])
+            the prompt tokens
+
+        cancel_event (Event)
+            the event that signals the query should be cancelled
+
+        static_prompt (list[str])
+            the static prompt tokens that precede the prompt
+
+        key (Hashable)
+            the key identifying the static prompt
+
+        max_tokens (int)
+            the maximum number of tokens to generate
+
+        sampling (Sampling)
+            the decoding strategy
+
+        Yields
+        -------
+        step (GenerationStepResult)
+            the generation steps of the prompt
+        """
+        results: SimpleQueue[QueryResult] = SimpleQueue()
+        query = PendingQuery(
+            prompt,
+            static_prompt,
+            key,
+            cancel_event,
+            results,
+            max_tokens=max_tokens,
+            sampling=sampling,
+        )
+        self.pending.put(query)
+
+        try:
+            while (step := results.get()) is not None:
+                if isinstance(step, Exception):
+                    raise step
+
+                yield step
+
+        finally:
+            query.closed = True
+
+    async def submit_async(
+        self,
+        prompt: list[str],
+        cancel_event: Event,
+        *,
+        static_prompt: list[str],
+        key: Hashable,
+        max_tokens: int,
+        sampling: Sampling,
+    ) -> AsyncIterator[GenerationStepResult]:
+        """
+        Summary
+        -------
+        schedule a prompt and stream back its generation steps on the event loop, without holding a thread
+
+        Parameters
+        ----------
+        prompt (list[str])
+            the prompt tokens
+
+        cancel_event (Event)
+            the event that signals the query should be cancelled
+
+        static_prompt (list[str])
+            the static prompt tokens that precede the prompt
+
+        key (Hashable)
+            the key identifying the static prompt
+
+        max_tokens (int)
+            the maximum number of tokens to generate
+
+        sampling (Sampling)
+            the decoding strategy
+
+        Yields
+        -------
+        step (GenerationStepResult)
+            the generation steps of the prompt
+        """
+        results: LoopQueue[QueryResult] = LoopQueue()
+        query = PendingQuery(
+            prompt,
+            static_prompt,
+            key,
+            cancel_event,
+            results,
+            max_tokens=max_tokens,
+            sampling=sampling,
+        )
+        self.pending.put(query)
+
+        try:
+            while (step := await results.get()) is not None:
+                if isinstance(step, Exception):
+                    raise step
+
+                yield step
+
+        finally:
+            query.closed = True
+
+    def close(self) -> None:
+        """
+        Summary
+        -------
+        stop accepting queries and wait for the running batches to finish
+        """
+        self.pending.put(None)
+        self.worker.join()
+        self.executor.shutdown(wait=True)
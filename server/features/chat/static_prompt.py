@@ -0,0 +1,20 @@
+from msgspec import Struct
+
+
+class EncodedStaticPrompt(Struct, kw_only=True, frozen=True, gc=False):
+    """
+    Summary
+    -------
+    a static prompt encoded once for reuse across queries
+
+    Attributes
+    ----------
+    tokens (list[str])
+        the encoded static prompt tokens, converted once into the form CTranslate2 generates from
+
+    max_query_length (int)
+        the maximum query length that fits in the context alongside the static prompt
+    """
+
+    tokens: list[str]
+    max_query_length: int
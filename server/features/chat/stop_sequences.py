@@ -0,0 +1,143 @@
+from collections.abc import AsyncIterator, Iterator, Sequence
+
+
+class StopSequences:
+    """
+    Summary
+    -------
+    an incremental matcher that truncates streamed text at the first stop sequence
+
+    Parameters
+    ----------
+    sequences (Sequence[str])
+        the stop sequences
+
+    Methods
+    -------
+    feed(text: str) -> tuple[str, bool]
+        consume the next piece of text
+
+    flush() -> str
+        release the text withheld at the end of the stream
+
+    truncate(pieces: Iterator[str]) -> Iterator[str]
+        stream text up to the first stop sequence
+
+    truncate_async(pieces: AsyncIterator[str]) -> AsyncIterator[str]
+        stream text up to the first stop sequence on the event loop
+    """
+
+    __slots__ = ("held", "max_held", "sequences")
+
+    def __init__(self, sequences: Sequence[str]) -> None:
+        self.sequences = [sequence for sequence in sequences if sequence]
+        self.max_held = max(map(len, self.sequences), default=1) - 1
+        self.held = ""
+
+    def feed(self, text: str) -> tuple[str, bool]:
+        """
+        Summary
+        -------
+        consume the next piece of text, withholding any suffix that could begin a stop sequence
+
+        Parameters
+        ----------
+        text (str)
+            the next piece of text
+
+        Returns
+        -------
+        text (str)
+            the text that can be released
+
+        stopped (bool)
+            whether a stop sequence was found
+        """
+        buffer = self.held + text
+        stop_indices = [index for sequence in self.sequences if (index := buffer.find(sequence)) != -1]
+
+        if stop_indices:
+            self.held = ""
+            return buffer[: min(stop_indices)], True
+
+        held_length = next(
+            (
+                length
+                for length in range(min(len(buffer), self.max_held), 0, -1)
+                if any(sequence.startswith(buffer[-length:]) for sequence in self.sequences)
+            ),
+            0,
+        )
+
+        self.held = buffer[len(buffer) - held_length :]
+        return buffer[: len(buffer) - held_length], False
+
+    def flush(self) -> str:
+        """
+        Summary
+        -------
+        release the text withheld at the end of the stream
+
+        Returns
+        -------
+        text (str)
+            the withheld text
+        """
+        held, self.held = self.held, ""
+        return held
+
+    def truncate(self, pieces: Iterator[str]) -> Iterator[str]:
+        """
+        Summary
+        -------
+        stream text up to the first stop sequence
+
+        Parameters
+        ----------
+        pieces (Iterator[str])
+            the pieces of text
+
+        Yields
+        -------
+        text (str)
+            the text preceding the first stop sequence
+        """
+        for piece in pieces:
+            text, stopped = self.feed(piece)
+
+            if text:
+                yield text
+
+            if stopped:
+                return
+
+        if text := self.flush():
+            yield text
+
+    async def truncate_async(self, pieces: AsyncIterator[str]) -> AsyncIterator[str]:
+        """
+        Summary
+        -------
+        stream text up to the first stop sequence on the event loop
+
+        Parameters
+        ----------
+        pieces (AsyncIterator[str])
+            the pieces of text
+
+        Yields
+        -------
+        text (str)
+            the text preceding the first stop sequence
+        """
+        async for piece in pieces:
+            text, stopped = self.feed(piece)
+
+            if text:
+                yield text
+
+            if stopped:
+                return
+
+        if text := self.flush():
+            yield text
@@ -1,6 +1,7 @@
-from collections.abc import Iterator, Sequence
+from collections.abc import AsyncIterator, Iterator, Sequence
 from typing import Self
 
+from server.features.chat.parameters import GenerationParameters
 from server.features.chat.protocol import ChatAgentProtocol
 from server.typedefs import Event, Message
 
@@ -13,8 +14,17 @@ class ChatModelStub(ChatAgentProtocol):
 
     Methods
     -------
-    query(messages: Sequence[Message], cancel_event: Event) -> Iterator[str] | None
+    lookup(messages: Sequence[Message], *, static_prompt: str | None = None, ...) -> tuple[str, ...] | None
+        look up the cached answer to a query, which a stub never has
+
+    query(messages: Sequence[Message], cancel_event: Event, *, static_prompt: str | None = None, ...)
         query the model
+
+    query_async(messages: Sequence[Message], cancel_event: Event, *, static_prompt: str | None = None, ...)
+        query the model, streaming the answer on the event loop
+
+    stream_async(messages: Sequence[Message], cancel_event: Event) -> AsyncIterator[str]
+        stream the canned response on the event loop
     """
 
     def __enter__(self) -> Self:
@@ -23,7 +33,43 @@ class ChatModelStub(ChatAgentProtocol):
     def __exit__(self, *_) -> None:
         return
 
-    def query(self, messages: Sequence[Message], cancel_event: Event) -> Iterator[str] | None:
+    def lookup(
+        self,
+        messages: Sequence[Message],  # noqa: ARG002
+        *,
+        static_prompt: str | None = None,  # noqa: ARG002
+        parameters: GenerationParameters | None = None,  # noqa: ARG002
+        model: str | None = None,  # noqa: ARG002
+    ) -> tuple[str, ...] | None:
+        return None
+
+    def query(
+        self,
+        messages: Sequence[Message],
+        cancel_event: Event,
+        *,
+        static_prompt: str | None = None,  # noqa: ARG002
+        parameters: GenerationParameters | None = None,  # noqa: ARG002
+        model: str | None = None,  # noqa: ARG002
+    ) -> Iterator[str] | None:
+        for message in messages:
+            if cancel_event.is_set():
+                break
+
+            yield message["content"]
+
+    async def query_async(
+        self,
+        messages: Sequence[Message],
+        cancel_event: Event,
+        *,
+        static_prompt: str | None = None,  # noqa: ARG002
+        parameters: GenerationParameters | None = None,  # noqa: ARG002
+        model: str | None = None,  # noqa: ARG002
+    ) -> AsyncIterator[str] | None:
+        return self.stream_async(messages, cancel_event)
+
+    async def stream_async(self, messages: Sequence[Message], cancel_event: Event) -> AsyncIterator[str]:
         for message in messages:
             if cancel_event.is_set():
                 break
@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from concurrent.futures import Future
+from logging import getLogger
+from queue import Empty, SimpleQueue
+from threading import Thread
+from time import monotonic
+from types import TracebackType
+from typing import TYPE_CHECKING, Self
+
+from server.features.ner.cache import TokenLabelCache
+from server.features.ner.decoder import TokenLabels
+from server.features.ner.protocol import Entity, EntitySpan, NamedEntityRecognitionProtocol
+
+if TYPE_CHECKING:
+    from server.features.ner.model import NamedEntityExtractor
+
+type PendingTexts = tuple[list[str], Future[list[TokenLabels]]]
+
+logger = getLogger(__name__)
+
+
+class NamedEntityBatcher(NamedEntityRecognitionProtocol):
+    """
+    Summary
+    -------
+    a named entity recognition model that coalesces concurrent requests into a single batch
+
+    Parameters
+    ----------
+    model (NamedEntityExtractor)
+        the model to label the batched texts with
+
+    cache (TokenLabelCache)
+        the cache of token labels to serve repeated texts from
+
+    max_batch_size (int)
+        the maximum number of texts to coalesce into a single batch
+
+    batch_window (float)
+        the number of seconds to wait for more requests before extracting a batch
+
+    Methods
+    -------
+    collect_batch(first: PendingTexts) -> tuple[list[PendingTexts], bool]
+        collect the requests that arrive within the batch window of the first request
+
+    run_batch(batch: list[PendingTexts]) -> None
+        label the tokens of a batch and resolve each request with its own results
+
+    collect() -> None
+        collect and extract batches until the batcher is closed
+
+    label_uncached(texts: list[str]) -> list[TokenLabels]
+        label the tokens of a list of texts, sharing a batch with concurrent requests
+
+    label(texts: list[str]) -> list[TokenLabels]
+        label the tokens of a list of texts, serving repeated texts from the cache
+
+    extract(texts: list[str]) -> Iterator[Iterator[Entity]]
+        extract the label of every token from a list of texts
+
+    extract_spans(texts: list[str]) -> Iterator[Iterator[EntitySpan]]
+        extract named entities from a list of texts, aggregated into spans
+    """
+
+    __slots__ = ("batch_window", "cache", "max_batch_size", "model", "pending", "worker")
+
+    def __init__(
+        self,
+        model: NamedEntityExtractor,
+        cache: TokenLabelCache,
+        *,
+        max_batch_size: int,
+        batch_window: float,
+    ) -> None:
+        self.model = model
+        self.cache = cache
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window
+        self.pending: SimpleQueue[PendingTexts | None] = SimpleQueue()
+        self.worker = Thread(target=self.collect, name="ner-batcher", daemon=True)
+
+    def __enter__(self) -> Self:
+        self.model.__enter__()
+        self.worker.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.pending.put(None)
+        self.worker.join()
+        self.cache.close()
+        self.model.__exit__(exc_type, exc_value, traceback)
+
+    def collect_batch(self, first: PendingTexts) -> tuple[list[PendingTexts], bool]:
+        """
+        Summary
+        -------
+        collect the requests that arrive within the batch window of the first request
+
+        Parameters
+        ----------
+        first (PendingTexts)
+            the first request of the batch
+
+        Returns
+        -------
+        batch (list[PendingTexts])
+            the collected batch
+
+        closed (bool)
+            whether the batcher was closed while collecting
+        """
+        batch = [first]
+        size = len(first[0])
+        deadline = monotonic() + self.batch_window
+
+        while size < self.max_batch_size and (timeout := deadline - monotonic()) > 0:
+            try:
+                pending = self.pending.get(timeout=timeout)
+
+            except Empty:
+                break
+
+            if pending is None:
+                return batch, True
+
+            batch.append(pending)
+            size += len(pending[0])
+
+        return batch, False
+
+    def run_batch(self, batch: list[PendingTexts]) -> None:
+        """
+        Summary
+        -------
+        label the tokens of a batch and resolve each request with its own results
+
+        Parameters
+        ----------
+        batch (list[PendingTexts])
+            the batch to extract
+        """
+        batch_texts = [text for texts, _ in batch for text in texts]
+
+        try:
+            results = self.model.label(batch_texts)
+
+        except Exception as exception:
+            logger.exception("Failed to label a batch of %d texts", len(batch_texts))
+
+            for _, future in batch:
+                future.set_exception(exception)
+
+            return
+
+        start = 0
+
+        for texts, future in batch:
+            future.set_result(results[start : start + len(texts)])
+            start += len(texts)
+
+    def collect(self) -> None:
+        """
+        Summary
+        -------
+        collect and extract batches until the batcher is closed
+        """
+        closed = False
+
+        while not closed and (first := self.pending.get()) is not None:
+            batch, closed = self.collect_batch(first)
+            self.run_batch(batch)
+
+    def label_uncached(self, texts: list[str]) -> list[TokenLabels]:
+        """
+        Summary
+        -------
+        label the tokens of a list of texts, sharing a batch with concurrent requests
+
+        Parameters
+        ----------
+        texts (list[str])
+            the texts to label
+
+        Returns
+        -------
+        token_labels (list[TokenLabels])
+            the labels of the tokens of each text
+        """
+        future: Future[list[TokenLabels]] = Future()
+        self.pending.put((texts, future))
+
+        return future.result()
+
+    def label(self, texts: list[str]) -> list[TokenLabels]:
+        """
+        Summary
+        -------
+        label the tokens of a list of texts, serving repeated texts from the cache and labelling each new text once
+
+        Parameters
+        ----------
+        texts (list[str])
+            the texts to label
+
+        Returns
+        -------
+        token_labels (list[TokenLabels])
+            the labels of the tokens of each text
+        """
+        if not self.cache:
+            return self.label_uncached(texts)
+
+        keys = [self.cache.digest(text) for text in texts]
+        token_labels = self.cache.lookup(keys)
+
+        if missing := {key: text for key, text in zip(keys, texts, strict=True) if key not in token_labels}:
+            labelled = list(zip(missing, self.label_uncached(list(missing.values())), strict=True))
+            self.cache.insert(labelled)
+            token_labels.update(labelled)
+
+        return [token_labels[key] for key in keys]
+
+    def extract(self, texts: list[str]) -> Iterator[Iterator[Entity]]:
+        """
+        Summary
+        -------
+        extract the label of every token from a list of texts
+
+        Parameters
+        ----------
+        texts (list[str])
+            the texts to extract named entities from
+
+        Returns
+        -------
+        entities (Iterator[Iterator[Entity]])
+            an iterator of iterators of Entity objects
+        """
+        return map(self.model.decoder.entities, self.label(texts))
+
+    def extract_spans(self, texts: list[str]) -> Iterator[Iterator[EntitySpan]]:
+        """
+        Summary
+        -------
+        extract named entities from a list of texts, aggregated into spans
+
+        Parameters
+        ----------
+        texts (list[str])
+            the texts to extract named entities from
+
+        Returns
+        -------
+        spans (Iterator[Iterator[EntitySpan]])
+            an iterator of iterators of EntitySpan objects
+        """
+        return map(self.model.decoder.spans, self.label(texts))
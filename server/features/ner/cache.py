@@ -0,0 +1,320 @@
+from collections import OrderedDict
+from collections.abc import Iterable, Sequence
+from hashlib import blake2b
+from sqlite3 import connect
+from threading import Lock
+from time import time
+
+from numpy import frombuffer, int32, int64, intp, uint8
+from opentelemetry.metrics import get_meter
+
+from server.features.ner.decoder import TokenLabels
+
+
+class TokenLabelStore:
+    """
+    Summary
+    -------
+    a byte-budgeted SQLite store of token labels that can be shared by every worker on the host
+
+    Parameters
+    ----------
+    database_path (str)
+        the path to the SQLite database
+
+    max_bytes (int)
+        the maximum number of bytes of token labels to keep in the store
+
+    Methods
+    -------
+    lookup(keys: Sequence[bytes]) -> dict[bytes, TokenLabels]
+        read the token labels stored under the keys
+
+    insert(entries: Sequence[tuple[bytes, TokenLabels]]) -> None
+        store token labels, evicting the least recently used beyond the budget
+
+    close() -> None
+        close the database connection
+    """
+
+    __slots__ = ("connection", "lock", "max_bytes", "pending_inserts")
+
+    trim_interval = 256
+    max_variables = 500
+
+    def __init__(self, database_path: str, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.pending_inserts = 0
+        self.lock = Lock()
+        self.connection = connect(database_path, timeout=5, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS token_labels ("
+            "key BLOB PRIMARY KEY, label_indices BLOB NOT NULL, offsets BLOB NOT NULL, "
+            "size INTEGER NOT NULL, last_used REAL NOT NULL"
+            ") WITHOUT ROWID",
+        )
+
+    def lookup(self, keys: Sequence[bytes]) -> dict[bytes, TokenLabels]:
+        """
+        Summary
+        -------
+        read the token labels stored under the keys, marking them as recently used, querying the keys in chunks that
+        stay below the SQLite variable limit
+
+        Parameters
+        ----------
+        keys (Sequence[bytes])
+            the keys to look up
+
+        Returns
+        -------
+        entries (dict[bytes, TokenLabels])
+            the token labels of the keys that were found
+        """
+        rows: list[tuple[bytes, bytes, bytes]] = []
+
+        with self.lock:
+            for start in range(0, len(keys), self.max_variables):
+                chunk = keys[start : start + self.max_variables]
+                placeholders = ", ".join("?" * len(chunk))
+                rows += self.connection.execute(
+                    f"SELECT key, label_indices, offsets FROM token_labels WHERE key IN ({placeholders})",  # noqa: S608
+                    chunk,
+                ).fetchall()
+
+            if rows:
+                self.connection.executemany(
+                    "UPDATE token_labels SET last_used = ? WHERE key = ?",
+                    [(time(), key) for key, _, _ in rows],
+                )
+
+        return {
+            key: TokenLabels(
+                label_indices=frombuffer(label_indices, uint8).astype(intp),
+                offsets=frombuffer(offsets, int32).astype(int64).reshape(-1, 2),
+            )
+            for key, label_indices, offsets in rows
+        }
+
+    def insert(self, entries: Sequence[tuple[bytes, TokenLabels]]) -> None:
+        """
+        Summary
+        -------
+        store token labels, evicting the least recently used beyond the budget
+
+        Parameters
+        ----------
+        entries (Sequence[tuple[bytes, TokenLabels]])
+            the keys and token labels to store
+        """
+        rows: list[tuple[bytes, bytes, bytes, int, float]] = []
+
+        for key, token_labels in entries:
+            label_indices = token_labels.label_indices.astype(uint8).tobytes()
+            offsets = token_labels.offsets.astype(int32).tobytes()
+            rows.append((key, label_indices, offsets, len(key) + len(label_indices) + len(offsets), time()))
+
+        with self.lock:
+            self.connection.executemany("INSERT OR REPLACE INTO token_labels VALUES (?, ?, ?, ?, ?)", rows)
+            self.pending_inserts += len(rows)
+
+            if self.pending_inserts < self.trim_interval:
+                return
+
+            self.pending_inserts = 0
+            self.connection.execute(
+                "DELETE FROM token_labels WHERE key IN ("
+                "SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY last_used DESC) AS total FROM token_labels) "
+                "WHERE total > ?"
+                ")",
+                (self.max_bytes,),
+            )
+
+    def close(self) -> None:
+        """
+        Summary
+        -------
+        close the database connection
+        """
+        with self.lock:
+            self.connection.close()
+
+
+class TokenLabelCache:
+    """
+    Summary
+    -------
+    a byte-budgeted LRU cache of token labels keyed on the content hash of each text
+
+    Parameters
+    ----------
+    namespace (str)
+        the namespace that separates token labels predicted by different models or settings
+
+    max_bytes (int)
+        the maximum number of bytes of token labels to keep in memory, or `0` to disable the cache
+
+    store (TokenLabelStore | None)
+        the store shared across workers to fall back on when an entry is not in memory
+
+    Methods
+    -------
+    digest(text: str) -> bytes
+        hash a text
+
+    lookup(keys: Sequence[bytes]) -> dict[bytes, TokenLabels]
+        find the cached token labels of the keys
+
+    insert_memory(entries: Iterable[tuple[bytes, TokenLabels]]) -> None
+        cache token labels in memory, evicting the least recently used entries beyond the budget
+
+    insert(entries: Sequence[tuple[bytes, TokenLabels]]) -> None
+        cache token labels in memory and in the store
+
+    close() -> None
+        close the store
+    """
+
+    __slots__ = ("cached_bytes", "entries", "hits", "lock", "max_bytes", "misses", "namespace", "size", "store")
+
+    def __init__(self, namespace: str, max_bytes: int, store: TokenLabelStore | None = None) -> None:
+        meter = get_meter(__name__)
+        self.namespace = namespace.encode()
+        self.max_bytes = max_bytes
+        self.store = store
+        self.cached_bytes = 0
+        self.entries: OrderedDict[bytes, TokenLabels] = OrderedDict()
+        self.lock = Lock()
+        self.hits = meter.create_counter("ner.cache.hits", description="named entity recognition cache hits")
+        self.misses = meter.create_counter("ner.cache.misses", description="named entity recognition cache misses")
+        self.size = meter.create_up_down_counter(
+            "ner.cache.size",
+            unit="By",
+            description="bytes of token labels held in memory by the named entity recognition cache",
+        )
+
+    def __bool__(self) -> bool:
+        return self.max_bytes > 0 or self.store is not None
+
+    def digest(self, text: str) -> bytes:
+        """
+        Summary
+        -------
+        hash a text
+
+        Parameters
+        ----------
+        text (str)
+            the text to hash
+
+        Returns
+        -------
+        digest (bytes)
+            the digest of the text
+        """
+        hasher = blake2b(self.namespace, digest_size=16)
+        hasher.update(b"\0")
+        hasher.update(text.encode())
+
+        return hasher.digest()
+
+    def lookup(self, keys: Sequence[bytes]) -> dict[bytes, TokenLabels]:
+        """
+        Summary
+        -------
+        find the cached token labels of the keys, reading through to the store for those not in memory
+
+        Parameters
+        ----------
+        keys (Sequence[bytes])
+            the keys to look up
+
+        Returns
+        -------
+        entries (dict[bytes, TokenLabels])
+            the token labels of the keys that were found
+        """
+        found: dict[bytes, TokenLabels] = {}
+
+        with self.lock:
+            for key in keys:
+                if (token_labels := self.entries.get(key)) is not None:
+                    self.entries.move_to_end(key)
+                    found[key] = token_labels
+
+        if found:
+            self.hits.add(len(found), {"tier": "memory"})
+
+        if self.store is not None and (missing := [key for key in dict.fromkeys(keys) if key not in found]):
+            stored = self.store.lookup(missing)
+            self.insert_memory(stored.items())
+            found.update(stored)
+
+            if stored:
+                self.hits.add(len(stored), {"tier": "disk"})
+
+        if misses := len(keys) - sum(key in found for key in keys):
+            self.misses.add(misses)
+
+        return found
+
+    def insert_memory(self, entries: Iterable[tuple[bytes, TokenLabels]]) -> None:
+        """
+        Summary
+        -------
+        cache token labels in memory, evicting the least recently used entries beyond the budget
+
+        Parameters
+        ----------
+        entries (Iterable[tuple[bytes, TokenLabels]])
+            the keys and token labels to cache
+        """
+        resized = 0
+
+        with self.lock:
+            for key, token_labels in entries:
+                size = token_labels.label_indices.nbytes + token_labels.offsets.nbytes
+
+                if key in self.entries or size > self.max_bytes:
+                    continue
+
+                self.entries[key] = token_labels
+                resized += size
+
+            self.cached_bytes += resized
+
+            while self.cached_bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                evicted_size = evicted.label_indices.nbytes + evicted.offsets.nbytes
+                self.cached_bytes -= evicted_size
+                resized -= evicted_size
+
+        if resized:
+            self.size.add(resized)
+
+    def insert(self, entries: Sequence[tuple[bytes, TokenLabels]]) -> None:
+        """
+        Summary
+        -------
+        cache token labels in memory and in the store
+
+        Parameters
+        ----------
+        entries (Sequence[tuple[bytes, TokenLabels]])
+            the keys and token labels to cache
+        """
+        self.insert_memory(entries)
+
+        if self.store is not None:
+            self.store.insert(entries)
+
+    def close(self) -> None:
+        """
+        Summary
+        -------
+        close the store
+        """
+        if self.store is not None:
+            self.store.close()
@@ -0,0 +1,182 @@
+from collections import OrderedDict
+from collections.abc import Callable
+from functools import partial
+from io import BytesIO
+from pathlib import Path
+from pickle import Unpickler, UnpicklingError
+from typing import Any
+from zipfile import ZipFile
+
+from numpy import ascontiguousarray, dtype, float16, float32, float64, frombuffer, int8, int16, int32, int64, ndarray
+from numpy.lib.stride_tricks import as_strided
+
+type Weights = ndarray[tuple[int, int], dtype[float32]]
+type Bias = ndarray[tuple[int], dtype[float32]]
+type LazyArray = Callable[[], ndarray[tuple[int, ...], dtype[Any]]]
+
+STORAGE_DTYPES = {
+    "DoubleStorage": float64,
+    "FloatStorage": float32,
+    "HalfStorage": float16,
+    "LongStorage": int64,
+    "IntStorage": int32,
+    "ShortStorage": int16,
+    "CharStorage": int8,
+}
+
+
+def view_tensor(
+    storage: LazyArray,
+    storage_offset: int,
+    size: tuple[int, ...],
+    stride: tuple[int, ...],
+) -> ndarray[tuple[int, ...], dtype[Any]]:
+    """
+    Summary
+    -------
+    view a torch tensor as a NumPy array of its storage
+
+    Parameters
+    ----------
+    storage (LazyArray)
+        the flat storage of the tensor, read on demand
+
+    storage_offset (int)
+        the offset of the tensor into its storage, in elements
+
+    size (tuple[int, ...])
+        the shape of the tensor
+
+    stride (tuple[int, ...])
+        the stride of the tensor, in elements
+
+    Returns
+    -------
+    tensor (ndarray[tuple[int, ...], dtype[Any]])
+        the tensor as a NumPy array
+    """
+    array = storage()
+
+    return as_strided(
+        array[storage_offset:],
+        shape=size,
+        strides=tuple(step * array.itemsize for step in stride),
+        writeable=False,
+    )
+
+
+def rebuild_tensor(
+    storage: LazyArray,
+    storage_offset: int,
+    size: tuple[int, ...],
+    stride: tuple[int, ...],
+    *_: object,
+) -> LazyArray:
+    """
+    Summary
+    -------
+    rebuild a pickled torch tensor without reading its storage, so only the tensors used are ever read
+
+    Parameters
+    ----------
+    storage (LazyArray)
+        the flat storage of the tensor, read on demand
+
+    storage_offset (int)
+        the offset of the tensor into its storage, in elements
+
+    size (tuple[int, ...])
+        the shape of the tensor
+
+    stride (tuple[int, ...])
+        the stride of the tensor, in elements
+
+    Returns
+    -------
+    tensor (LazyArray)
+        the tensor as a NumPy array, read on demand
+    """
+    return partial(view_tensor, storage, storage_offset, size, stride)
+
+
+class CheckpointGlobalError(UnpicklingError):
+    def __init__(self, module: str, name: str) -> None:
+        super().__init__(f"{module}.{name} is not allowed in a checkpoint!")
+
+
+class TorchCheckpointUnpickler(Unpickler):
+    """
+    Summary
+    -------
+    an unpickler that reads the state dict of a zip-format torch checkpoint into NumPy arrays without importing torch
+
+    Parameters
+    ----------
+    archive (ZipFile)
+        the checkpoint archive
+
+    prefix (str)
+        the name of the top-level directory of the archive
+    """
+
+    def __init__(self, archive: ZipFile, prefix: str) -> None:
+        super().__init__(BytesIO(archive.read(f"{prefix}/data.pkl")))
+        self.archive = archive
+        self.prefix = prefix
+
+    def find_class(self, module: str, name: str) -> Callable[..., object]:
+        if module == "torch._utils" and name == "_rebuild_tensor_v2":
+            return rebuild_tensor
+
+        if module == "torch" and name in STORAGE_DTYPES:
+            return STORAGE_DTYPES[name]
+
+        if module == "collections" and name == "OrderedDict":
+            return OrderedDict
+
+        raise CheckpointGlobalError(module, name)
+
+    def load_storage(self, key: str, storage_dtype: type) -> ndarray[tuple[int], dtype[Any]]:
+        return frombuffer(self.archive.read(f"{self.prefix}/data/{key}"), storage_dtype)
+
+    def persistent_load(self, pid: tuple[str, type, str, str, int]) -> LazyArray:
+        _, storage_dtype, key, _, _ = pid
+        return partial(self.load_storage, key, storage_dtype)
+
+
+def load_classifier(model_path: str) -> tuple[Weights, Bias]:
+    """
+    Summary
+    -------
+    load only the token classification head from the model snapshot as NumPy arrays
+
+    Parameters
+    ----------
+    model_path (str)
+        the path to the model snapshot
+
+    Returns
+    -------
+    weights (Weights)
+        the transposed classifier weights, laid out for multiplying with the hidden states
+
+    bias (Bias)
+        the classifier bias
+    """
+    from safetensors import safe_open  # noqa: PLC0415
+
+    safetensors_path = Path(model_path) / "model.safetensors"
+
+    if safetensors_path.exists():
+        with safe_open(safetensors_path, framework="np") as checkpoint:
+            weights = checkpoint.get_tensor("classifier.weight")
+            bias = checkpoint.get_tensor("classifier.bias")
+
+    else:
+        with ZipFile(Path(model_path) / "pytorch_model.bin") as archive:
+            prefix = archive.namelist()[0].split("/", 1)[0]
+            state_dict = TorchCheckpointUnpickler(archive, prefix).load()
+            weights = state_dict["classifier.weight"]()
+            bias = state_dict["classifier.bias"]()
+
+    return ascontiguousarray(weights.T, float32), ascontiguousarray(bias, float32)
@@ -0,0 +1,116 @@
+from collections.abc import Iterator, Mapping
+from typing import Literal
+
+from msgspec import Struct
+from numpy import asarray, bool_, concatenate, dtype, flatnonzero, int64, intp, ndarray
+
+from server.features.ner.protocol import Entity, EntitySpan, Labels, SpanLabels
+
+
+class TokenLabels(Struct, kw_only=True, frozen=True, gc=False):
+    """
+    Summary
+    -------
+    the predicted labels of the tokens of a text, excluding special tokens
+
+    Attributes
+    ----------
+    label_indices (ndarray[tuple[int], dtype[intp]])
+        the label index of each token
+
+    offsets (ndarray[tuple[int, Literal[2]], dtype[int64]])
+        the start and end character offsets of each token
+    """
+
+    label_indices: ndarray[tuple[int], dtype[intp]]
+    offsets: ndarray[tuple[int, Literal[2]], dtype[int64]]
+
+
+class LabelDecoder:
+    """
+    Summary
+    -------
+    decodes the predicted token labels of a text into entities
+
+    Parameters
+    ----------
+    labels (Mapping[int, Labels])
+        the label of each label index
+
+    Methods
+    -------
+    entities(token_labels: TokenLabels) -> Iterator[Entity]
+        decode the label of every token
+
+    spans(token_labels: TokenLabels) -> Iterator[EntitySpan]
+        aggregate consecutive tokens of the same entity into spans
+    """
+
+    __slots__ = ("begins", "entity_types", "labels", "span_labels")
+
+    def __init__(self, labels: Mapping[int, Labels]) -> None:
+        names = [labels[index] for index in range(len(labels))]
+        self.labels = names
+        entity_names = list(dict.fromkeys(name[2:] for name in names if name != "O"))
+        self.span_labels: list[SpanLabels] = entity_names  # pyright: ignore [reportAssignmentType]
+        self.entity_types = asarray([0 if name == "O" else entity_names.index(name[2:]) + 1 for name in names], intp)
+        self.begins = asarray([name.startswith("B-") for name in names], bool_)
+
+    def entities(self, token_labels: TokenLabels) -> Iterator[Entity]:
+        """
+        Summary
+        -------
+        decode the label of every token
+
+        Parameters
+        ----------
+        token_labels (TokenLabels)
+            the predicted token labels
+
+        Returns
+        -------
+        entities (Iterator[Entity])
+            the label of every token
+        """
+        return (
+            Entity(label=self.labels[label_index], start=start, end=end)
+            for label_index, (start, end) in zip(
+                token_labels.label_indices.tolist(),
+                token_labels.offsets.tolist(),
+                strict=True,
+            )
+        )
+
+    def spans(self, token_labels: TokenLabels) -> Iterator[EntitySpan]:
+        """
+        Summary
+        -------
+        aggregate consecutive tokens of the same entity into spans
+
+        Parameters
+        ----------
+        token_labels (TokenLabels)
+            the predicted token labels
+
+        Returns
+        -------
+        spans (Iterator[EntitySpan])
+            the entity spans
+        """
+        entity_types = self.entity_types[token_labels.label_indices]
+        begins = self.begins[token_labels.label_indices]
+        is_entity = entity_types != 0
+        continues = concatenate(([False], entity_types[1:] == entity_types[:-1])) & ~begins
+        starts = is_entity & ~continues
+        ends = is_entity & ~concatenate((continues[1:], [False]))
+        start_indices = flatnonzero(starts)
+
+        return (
+            EntitySpan(label=self.span_labels[entity_type - 1], start=start, end=end)
+            for entity_type, start, end in zip(
+                entity_types[start_indices].tolist(),
+                token_labels.offsets[start_indices, 0].tolist(),
+                token_labels.offsets[flatnonzero(ends), 1].tolist(),
+                strict=True,
+            )
+        )
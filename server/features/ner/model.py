@@ -1,15 +1,94 @@
-from collections.abc import Iterator, Mapping
-from typing import Literal, Self
+from __future__ import annotations
 
-from ctranslate2 import Encoder, StorageView
-from numpy import asarray, dtype, int8, int32, int64, ndarray
-from torch import Tensor, as_tensor, autocast, inference_mode
-from transformers.models.bert import BertForTokenClassification, BertTokenizer
+from collections.abc import Iterator, Sequence
+from typing import TYPE_CHECKING, Self
 
-from server.features.ner.protocol import Entity, NamedEntityRecognitionProtocol
+from numpy import asarray, concatenate, dtype, int32, int64, intp, ndarray, zeros
+
+from server.features.ner.batcher import NamedEntityBatcher
+from server.features.ner.cache import TokenLabelCache, TokenLabelStore
+from server.features.ner.classifier import load_classifier
+from server.features.ner.decoder import LabelDecoder, TokenLabels
+from server.features.ner.protocol import Entity, EntitySpan, NamedEntityRecognitionProtocol
 from server.utils import huggingface_download
 
-type Labels = Literal["O", "B-MISC", "I-MISC", "B-PER", "I-PER", "B-ORG", "I-ORG", "B-LOC", "I-LOC"]
+if TYPE_CHECKING:
+    from transformers.models.bert import BertTokenizer
+
+
+def bucket_by_length(lengths: Sequence[int], max_batch_tokens: int) -> Iterator[list[int]]:
+    """
+    Summary
+    -------
+    group sequences of similar length into batches that stay within a padded token budget
+
+    Parameters
+    ----------
+    lengths (Sequence[int])
+        the number of tokens in each sequence
+
+    max_batch_tokens (int)
+        the maximum number of tokens in a batch, counting padding
+
+    Yields
+    -------
+    bucket (list[int])
+        the indices of the sequences in a batch, shortest first
+    """
+    bucket: list[int] = []
+
+    for index in sorted(range(len(lengths)), key=lengths.__getitem__):
+        if bucket and (len(bucket) + 1) * lengths[index] > max_batch_tokens:
+            yield bucket
+            bucket = []
+
+        bucket.append(index)
+
+    if bucket:
+        yield bucket
+
+
+def sliding_windows(length: int, window_length: int, overlap: int) -> Iterator[tuple[int, int, int, int]]:
+    """
+    Summary
+    -------
+    split a sequence into overlapping windows, each owning the half of its overlaps nearest to its own centre
+
+    Parameters
+    ----------
+    length (int)
+        the number of tokens in the sequence
+
+    window_length (int)
+        the maximum number of tokens in a window
+
+    overlap (int)
+        the number of tokens shared by consecutive windows
+
+    Yields
+    -------
+    start (int)
+        the start of the window
+
+    end (int)
+        the end of the window
+
+    owned_start (int)
+        the start of the tokens the window labels in the merged sequence
+
+    owned_end (int)
+        the end of the tokens the window labels in the merged sequence
+    """
+    stride = max(window_length - overlap, 1)
+    start = owned_start = 0
+
+    while (end := min(start + window_length, length)) < length:
+        owned_end = (start + stride + end) // 2
+        yield start, end, owned_start, owned_end
+        start += stride
+        owned_start = owned_end
+
+    yield start, end, owned_start, length
 
 
 class NamedEntityExtractor(NamedEntityRecognitionProtocol):
@@ -18,74 +97,111 @@ class NamedEntityExtractor(NamedEntityRecognitionProtocol):
     -------
     a class for extracting named entities from text
 
+    Parameters
+    ----------
+    model_path (str)
+        the path to the model snapshot
+
+    max_batch_tokens (int)
+        the maximum number of tokens to encode in a single batch, counting padding
+
+    window_overlap (int)
+        the number of tokens shared by consecutive windows of texts longer than the model's maximum sequence length
+
     Methods
     -------
+    label_tokens(input_indices: Sequence[Sequence[int]]) -> list[ndarray[tuple[int], dtype[intp]]]
+        label the tokens of a batch of similar length sequences
+
+    label(texts: list[str]) -> list[TokenLabels]
+        label the tokens of a list of texts
+
     extract(texts: list[str]) -> Iterator[Iterator[Entity]]
-        extract named entities from a list of texts
+        extract the label of every token from a list of texts
+
+    extract_spans(texts: list[str]) -> Iterator[Iterator[EntitySpan]]
+        extract named entities from a list of texts, aggregated into spans
     """
 
-    __slots__ = ("encoder", "labels", "model", "model_classifier", "tokeniser")
+    __slots__ = (
+        "classifier_bias",
+        "classifier_weights",
+        "decoder",
+        "encoder",
+        "max_batch_tokens",
+        "max_sequence_length",
+        "tokeniser",
+        "window_overlap",
+    )
 
-    def __init__(self, *, model_path: str) -> None:
-        model = BertForTokenClassification.from_pretrained(model_path)
+    def __init__(self, *, model_path: str, max_batch_tokens: int, window_overlap: int) -> None:
+        from ctranslate2 import Encoder  # noqa: PLC0415
+        from transformers.models.bert import BertConfig, BertTokenizer  # noqa: PLC0415
 
+        config = BertConfig.from_pretrained(model_path)
         self.encoder = Encoder(model_path, compute_type="auto", max_queued_batches=-1)
         self.tokeniser: BertTokenizer = BertTokenizer.from_pretrained(model_path)
-        self.labels: Mapping[int, Labels] = model.config.id2label  # pyright: ignore [reportAttributeAccessIssue]
-        self.model_classifier = model.classifier
-        self.model_classifier.eval()
+        self.decoder = LabelDecoder(config.id2label)  # pyright: ignore [reportArgumentType]
+        self.max_sequence_length: int = config.max_position_embeddings
+        self.classifier_weights, self.classifier_bias = load_classifier(model_path)
+        self.max_batch_tokens = max(max_batch_tokens, self.max_sequence_length)
+        self.window_overlap = window_overlap
 
     def __enter__(self) -> Self:
         return self
 
     def __exit__(self, *_) -> None:
         del self.encoder
-        del self.model_classifier
+        del self.classifier_weights
+        del self.classifier_bias
         del self.tokeniser
 
-    def convert_indices_to_entity_map(
-        self,
-        token_label_indices: Tensor,
-        special_tokens_mask: ndarray[tuple[int], dtype[int64]],
-        offset_mapping: ndarray[tuple[int, Literal[2]], dtype[int64]],
-    ) -> Iterator[Entity]:
+    def label_tokens(self, input_indices: Sequence[Sequence[int]]) -> list[ndarray[tuple[int], dtype[intp]]]:
         """
         Summary
         -------
-        convert a sequence of token label indices into a sequence of Entity objects
+        label the tokens of a batch of similar length sequences, padding them only to the longest in the batch
 
         Parameters
         ----------
-        token_label_indices (Tensor)
-            a tensor of token label indices
-
-        special_tokens_mask (ndarray[tuple[int], dtype[int64]])
-            a mask indicating which tokens are special tokens
-
-        offset_mapping (ndarray[tuple[int, Literal[2]], dtype[int64]])
-            a mapping of token start and end character offsets
+        input_indices (Sequence[Sequence[int]])
+            the token indices of each sequence
 
         Returns
         -------
-        entities (Iterator[Entity])
-            an iterator of Entity objects
+        token_label_indices (list[ndarray[tuple[int], dtype[intp]]])
+            the label index of every token in each sequence, without padding
         """
-        return (
-            Entity(label=self.labels[int(token_label_index)], start=int(start), end=int(end))
-            for token_label_index, is_special_token, (start, end) in zip(
-                token_label_indices,
-                special_tokens_mask,
-                offset_mapping,
-                strict=True,
-            )
-            if not is_special_token
+        from ctranslate2 import StorageView  # noqa: PLC0415
+
+        lengths = [len(indices) for indices in input_indices]
+        padded_indices = zeros((len(input_indices), max(lengths)), int32)
+
+        for row, indices in enumerate(input_indices):
+            padded_indices[row, : len(indices)] = indices
+
+        output = self.encoder.forward_batch(
+            StorageView.from_array(padded_indices),
+            StorageView.from_array(asarray(lengths, int32)),
         )
 
-    def extract(self, texts: list[str]) -> Iterator[Iterator[Entity]]:
+        logits = asarray(output.last_hidden_state) @ self.classifier_weights
+        logits += self.classifier_bias
+        token_label_indices_batch = logits.argmax(-1)
+
+        return [
+            token_label_indices[:length]
+            for token_label_indices, length in zip(token_label_indices_batch, lengths, strict=True)
+        ]
+
+    def label(self, texts: list[str]) -> list[TokenLabels]:
         """
         Summary
         -------
-        extract named entities from a list of texts
+        label the tokens of a list of texts, encoding texts of similar length together to minimise padding
+
+        texts longer than the model's maximum sequence length are split into overlapping windows that are batched
+        together with every other window, with each token labelled by the window it is most central in
 
         Parameters
         ----------
@@ -94,40 +210,151 @@ class NamedEntityExtractor(NamedEntityRecognitionProtocol):
 
         Returns
         -------
-        entities (Iterator[Iterator[Entity]])
-            an iterator of iterators of Entity objects
+        token_labels (list[TokenLabels])
+            the labels of the tokens of each text
         """
         batch_dict = self.tokeniser(
             texts,
-            padding=True,
-            return_tensors="np",
             return_token_type_ids=False,
+            return_attention_mask=False,
             return_special_tokens_mask=True,
             return_offsets_mapping=True,
         )
 
-        input_indices: ndarray[tuple[int, int], dtype[int8]] = batch_dict["input_ids"]  # pyright: ignore [reportAssignmentType]
-        attention_mask: ndarray[tuple[int, int], dtype[int8]] = batch_dict["attention_mask"]  # pyright: ignore [reportAssignmentType]
-        special_tokens_mask_batch: ndarray[tuple[int, int], dtype[int64]] = batch_dict["special_tokens_mask"]  # pyright: ignore [reportAssignmentType]
-        offset_mapping_batch: ndarray[tuple[int, int, Literal[2]], dtype[int64]] = batch_dict["offset_mapping"]  # pyright: ignore [reportAssignmentType]
-        output = self.encoder.forward_batch(
-            StorageView.from_array(input_indices.astype(int32)),
-            StorageView.from_array(attention_mask.sum(1, int32)),
-        )
+        input_indices_batch: list[list[int]] = batch_dict["input_ids"]  # pyright: ignore [reportAssignmentType]
+        special_tokens_mask_batch: list[list[int]] = batch_dict["special_tokens_mask"]  # pyright: ignore [reportAssignmentType]
+        offset_mapping_batch: list[list[tuple[int, int]]] = batch_dict["offset_mapping"]  # pyright: ignore [reportAssignmentType]
+        window_indices_batch: list[list[int]] = []
+        window_spans: list[tuple[int, int, int, int]] = []
+
+        for index, input_indices in enumerate(input_indices_batch):
+            first_token, *content, last_token = input_indices
+
+            for start, end, owned_start, owned_end in sliding_windows(
+                len(content),
+                self.max_sequence_length - 2,
+                self.window_overlap,
+            ):
+                window_indices_batch.append([first_token, *content[start:end], last_token])
+                window_spans.append((index, start, owned_start, owned_end))
+
+        lengths = [len(window_indices) for window_indices in window_indices_batch]
+        window_labels: dict[int, ndarray[tuple[int], dtype[intp]]] = {}
+
+        for bucket in bucket_by_length(lengths, self.max_batch_tokens):
+            bucket_labels = self.label_tokens([window_indices_batch[window] for window in bucket])
+            window_labels.update(zip(bucket, bucket_labels, strict=True))
+
+        token_label_pieces: list[list[ndarray[tuple[int], dtype[intp]]]] = [[] for _ in texts]
+        special_token_label = zeros(1, intp)
+
+        for window, (index, start, owned_start, owned_end) in enumerate(window_spans):
+            token_label_pieces[index].append(window_labels[window][1 + owned_start - start : 1 + owned_end - start])
 
-        with inference_mode(), autocast("cpu"):
-            token_label_indices_batch = self.model_classifier(as_tensor(asarray(output.last_hidden_state))).argmax(-1)
+        token_label_indices_batch = [
+            concatenate([special_token_label, *pieces, special_token_label]) for pieces in token_label_pieces
+        ]
 
-        return (
-            self.convert_indices_to_entity_map(token_label_indices, special_tokens_mask, offset_mapping)
-            for token_label_indices, special_tokens_mask, offset_mapping in zip(
+        return [
+            TokenLabels(label_indices=token_label_indices[is_token], offsets=asarray(offset_mapping, int64)[is_token])
+            for token_label_indices, offset_mapping, is_token in zip(
                 token_label_indices_batch,
-                special_tokens_mask_batch,
                 offset_mapping_batch,
+                (asarray(special_tokens_mask) == 0 for special_tokens_mask in special_tokens_mask_batch),
                 strict=True,
             )
-        )
+        ]
+
+    def extract(self, texts: list[str]) -> Iterator[Iterator[Entity]]:
+        """
+        Summary
+        -------
+        extract the label of every token from a list of texts
 
+        Parameters
+        ----------
+        texts (list[str])
+            the texts to extract named entities from
+
+        Returns
+        -------
+        entities (Iterator[Iterator[Entity]])
+            an iterator of iterators of Entity objects
+        """
+        return map(self.decoder.entities, self.label(texts))
+
+    def extract_spans(self, texts: list[str]) -> Iterator[Iterator[EntitySpan]]:
+        """
+        Summary
+        -------
+        extract named entities from a list of texts, aggregated into spans
+
+        Parameters
+        ----------
+        texts (list[str])
+            the texts to extract named entities from
+
+        Returns
+        -------
+        spans (Iterator[Iterator[EntitySpan]])
+            an iterator of iterators of EntitySpan objects
+        """
+        return map(self.decoder.spans, self.label(texts))
+
+
+def get_named_entity_recognition_model(
+    *,
+    max_batch_size: int,
+    max_batch_tokens: int,
+    window_overlap: int,
+    batch_window: float,
+    cache_bytes: int,
+    cache_path: str | None,
+    cache_disk_bytes: int,
+) -> NamedEntityRecognitionProtocol:
+    """
+    Summary
+    -------
+    load the named entity recognition model behind a batcher that coalesces concurrent requests
+
+    Parameters
+    ----------
+    max_batch_size (int)
+        the maximum number of texts to coalesce into a single batch
+
+    max_batch_tokens (int)
+        the maximum number of tokens to encode in a single batch, counting padding
+
+    window_overlap (int)
+        the number of tokens shared by consecutive windows of long texts
+
+    batch_window (float)
+        the number of seconds to wait for more requests before extracting a batch
+
+    cache_bytes (int)
+        the maximum number of bytes of token labels to cache in memory, or `0` to disable it
+
+    cache_path (str | None)
+        the path to the SQLite database to share cached token labels across workers through, if any
+
+    cache_disk_bytes (int)
+        the maximum number of bytes of token labels to keep in the SQLite database
+
+    Returns
+    -------
+    model (NamedEntityRecognitionProtocol)
+        the named entity recognition model
+    """
+    repository = "winstxnhdw/bert-large-NER-ct2"
+    store = TokenLabelStore(cache_path, cache_disk_bytes) if cache_path else None
 
-def get_named_entity_recognition_model() -> NamedEntityRecognitionProtocol:
-    return NamedEntityExtractor(model_path=huggingface_download("winstxnhdw/bert-large-NER-ct2"))
+    return NamedEntityBatcher(
+        NamedEntityExtractor(
+            model_path=huggingface_download(repository),
+            max_batch_tokens=max_batch_tokens,
+            window_overlap=window_overlap,
+        ),
+        TokenLabelCache(f"{repository}:{window_overlap}", cache_bytes, store),
+        max_batch_size=max_batch_size,
+        batch_window=batch_window,
+    )
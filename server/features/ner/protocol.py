@@ -5,6 +5,7 @@ from typing import Literal, Protocol, Self
 from msgspec import Struct
 
 type Labels = Literal["O", "B-MISC", "I-MISC", "B-PER", "I-PER", "B-ORG", "I-ORG", "B-LOC", "I-LOC"]
+type SpanLabels = Literal["MISC", "PER", "ORG", "LOC"]
 
 
 class Entity(Struct, kw_only=True, frozen=True, gc=False):
@@ -30,6 +31,29 @@ class Entity(Struct, kw_only=True, frozen=True, gc=False):
     end: int
 
 
+class EntitySpan(Struct, kw_only=True, frozen=True, gc=False):
+    """
+    Summary
+    -------
+    the aggregated named entity response schema, spanning every token of the entity
+
+    Attributes
+    ----------
+    label (SpanLabels)
+        the entity type
+
+    start (int)
+        the start index of the entity in the text
+
+    end (int)
+        the end index of the entity in the text
+    """
+
+    label: SpanLabels
+    start: int
+    end: int
+
+
 class NamedEntityRecognitionProtocol(Protocol):
     """
     Summary
@@ -38,11 +62,15 @@ class NamedEntityRecognitionProtocol(Protocol):
 
     Methods
     -------
-    query(messages: Sequence[Message], cancel_event: Event) -> Iterator[str] | None
-        query the model
+    extract(texts: list[str]) -> Iterator[Iterator[Entity]]
+        extract the label of every token from a list of texts
+
+    extract_spans(texts: list[str]) -> Iterator[Iterator[EntitySpan]]
+        extract named entities from a list of texts, aggregated into spans
     """
 
     def extract(self, texts: list[str]) -> Iterator[Iterator[Entity]]: ...
+    def extract_spans(self, texts: list[str]) -> Iterator[Iterator[EntitySpan]]: ...
     def __enter__(self) -> Self: ...
     def __exit__(
         self,
@@ -0,0 +1,100 @@
+from argparse import ArgumentParser
+from subprocess import run
+from sys import executable
+
+from msgspec import Struct
+
+
+class ImportTime(Struct, kw_only=True, frozen=True, gc=False):
+    """
+    Summary
+    -------
+    the time taken to import a module
+
+    Attributes
+    ----------
+    module (str)
+        the name of the imported module
+
+    self_time (int)
+        the number of microseconds spent importing the module itself
+
+    cumulative_time (int)
+        the number of microseconds spent importing the module and its dependencies
+    """
+
+    module: str
+    self_time: int
+    cumulative_time: int
+
+
+def profile_imports(module: str) -> list[ImportTime]:
+    """
+    Summary
+    -------
+    import a module in a fresh interpreter and record how long each of its imports took
+
+    Parameters
+    ----------
+    module (str)
+        the name of the module to import
+
+    Returns
+    -------
+    import_times (list[ImportTime])
+        the import times of every module imported, in import order
+    """
+    process = run(  # noqa: S603
+        [executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+
+    import_times: list[ImportTime] = []
+
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+
+        self_time, cumulative_time, name = line.removeprefix("import time:").split("|", 2)
+
+        if not self_time.strip().isdigit():
+            continue
+
+        import_times.append(
+            ImportTime(module=name.strip(), self_time=int(self_time), cumulative_time=int(cumulative_time)),
+        )
+
+    return import_times
+
+
+def main() -> None:
+    """
+    Summary
+    -------
+    print the slowest imports incurred when starting the server
+    """
+    parser = ArgumentParser(description="list the slowest imports incurred when starting the server")
+    parser.add_argument("--module", default="server.app", help="the module to profile the import of")
+    parser.add_argument("--limit", type=int, default=20, help="the number of imports to list")
+    arguments = parser.parse_args()
+    import_times = profile_imports(arguments.module)
+    total_time = next(
+        (import_time.cumulative_time for import_time in import_times if import_time.module == arguments.module),
+        0,
+    )
+    slowest_imports = sorted(import_times, key=lambda import_time: import_time.cumulative_time, reverse=True)
+
+    print(f"{'cumulative (ms)':>16} {'self (ms)':>10}  module")  # noqa: T201
+
+    for import_time in slowest_imports[: arguments.limit]:
+        print(  # noqa: T201
+            f"{import_time.cumulative_time / 1000:>16.1f} {import_time.self_time / 1000:>10.1f}  {import_time.module}",
+        )
+
+    print(f"\nimporting {arguments.module} took {total_time / 1000:.1f} ms")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,3 @@
+from server.lifespans.chat_model import chat_model_factory as chat_model_factory
 from server.lifespans.chat_model import load_chat_model as load_chat_model
+from server.lifespans.ner_model import load_ner_model as load_ner_model
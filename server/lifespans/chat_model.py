@@ -1,48 +1,97 @@
 from collections.abc import AsyncGenerator, Callable
 from contextlib import AbstractAsyncContextManager, asynccontextmanager
+from functools import partial
 
 from litestar import Litestar
 
-from server.features.chat import get_chat_model
+from server.config import Config
+from server.features.chat import (
+    AdmittedChatAgent,
+    ChatAgentProtocol,
+    ChatModelPool,
+    ChatReplicaRouter,
+    get_chat_model,
+    get_chat_model_size,
+)
+from server.utils import ModelLoader
+
+
+def chat_model_factory(config: Config) -> Callable[[], ChatAgentProtocol]:
+    """
+    Summary
+    -------
+    return a picklable factory that loads the pool of chat models described by the config
+
+    Parameters
+    ----------
+    config (Config)
+        the application config
+
+    Returns
+    -------
+    factory (Callable[[], ChatAgentProtocol])
+        a factory that loads the pool of chat models
+    """
+    load_chat_model = partial(
+        get_chat_model,
+        chat_model_threads=config.chat_model_threads,
+        intra_threads=config.chat_model_intra_threads,
+        use_cuda=config.use_cuda,
+        stub=config.stub,
+        max_batch_size=config.chat_max_batch_size,
+        batch_window=config.chat_batch_window_ms / 1000,
+        response_cache_bytes=config.chat_response_cache_bytes,
+        response_cache_ttl=config.chat_response_cache_ttl_s,
+        static_prompts=config.chat_static_prompts,
+    )
+
+    return partial(
+        ChatModelPool,
+        config.chat_models,
+        default_model=config.chat_default_model,
+        tiers=config.chat_model_tiers,
+        memory_budget=config.chat_model_memory_bytes,
+        get_chat_model=load_chat_model,
+        get_model_size=partial(get_chat_model_size, stub=config.stub),
+    )
 
 
 @asynccontextmanager
 async def chat_model_lifespan(
-    app: Litestar, *, chat_model_threads: int, use_cuda: bool, stub: bool
+    app: Litestar,
+    *,
+    get_chat_model: Callable[[], AdmittedChatAgent],
+    lazy: bool,
 ) -> AsyncGenerator[None]:
     """
     Summary
     -------
-    load the chat model
+    load the chat model in the background, without blocking startup
 
     Parameters
     ----------
     app (Litestar)
         the Litestar application
 
-    state (AppState)
-        the application state
+    get_chat_model (Callable[[], AdmittedChatAgent])
+        the factory that loads the chat model behind its admission controller
 
-    chat_model_threads (int)
-        the number of parallel inference threads to use for the chat model
+    lazy (bool)
+        whether to defer loading the chat model until the first query
+    """
+    app.state.chat = chat_model = ModelLoader("chat", get_chat_model)
 
-    use_cuda (bool)
-        whether to use CUDA for inference
+    if not lazy:
+        chat_model.start()
 
-    stub (bool)
-        whether to use a stub model
-    """
-    with get_chat_model(chat_model_threads, use_cuda=use_cuda, stub=stub) as chat_model:
-        app.state.chat = chat_model
+    try:
         yield
 
+    finally:
+        chat_model.close()
 
-def load_chat_model(
-    chat_model_threads: int,
-    *,
-    use_cuda: bool,
-    stub: bool,
-) -> Callable[[Litestar], AbstractAsyncContextManager[None]]:
+
+def load_chat_model(config: Config) -> Callable[[Litestar], AbstractAsyncContextManager[None]]:
     """
     Summary
     -------
@@ -50,23 +99,29 @@ def load_chat_model(
 
     Parameters
     ----------
-    chat_model_threads (int)
-        the number of parallel inference threads to use for the chat model
-
-    use_cuda (bool)
-        whether to use CUDA for inference
-
-    stub (bool)
-        whether to use a stub object
+    config (Config)
+        the application config
 
     Returns
     -------
     lifespan (Callable[[Litestar], AbstractAsyncContextManager[None]])
         a Litestar-compatible lifespan context manager
     """
+    factory = (
+        partial(ChatReplicaRouter, config.chat_replica_addresses)
+        if config.chat_replica_addresses
+        else chat_model_factory(config)
+    )
+
+    max_in_flight = config.chat_max_in_flight or config.chat_max_batch_size * config.chat_model_threads
+    lazy = "chat" in config.lazy_models
+
     return lambda app: chat_model_lifespan(
         app,
-        chat_model_threads=chat_model_threads,
-        use_cuda=use_cuda,
-        stub=stub,
+        get_chat_model=lambda: AdmittedChatAgent(
+            factory(),
+            max_in_flight=max_in_flight,
+            max_queued=config.chat_max_queued,
+        ),
+        lazy=lazy,
     )
@@ -1,37 +1,75 @@
 from collections.abc import AsyncGenerator, Callable
 from contextlib import AbstractAsyncContextManager, asynccontextmanager
+from functools import partial
 
 from litestar import Litestar
 
-from server.features.ner import get_named_entity_recognition_model
+from server.config import Config
+from server.features.ner import NamedEntityRecognitionProtocol, get_named_entity_recognition_model
+from server.utils import ModelLoader
 
 
 @asynccontextmanager
-async def ner_model_lifespan(app: Litestar) -> AsyncGenerator[None]:
+async def ner_model_lifespan(
+    app: Litestar,
+    *,
+    get_ner_model: Callable[[], NamedEntityRecognitionProtocol],
+    lazy: bool,
+) -> AsyncGenerator[None]:
     """
     Summary
     -------
-    load the named entity recognition model
+    load the named entity recognition model in the background, without blocking startup
 
     Parameters
     ----------
     app (Litestar)
         the Litestar application
+
+    get_ner_model (Callable[[], NamedEntityRecognitionProtocol])
+        the factory that loads the named entity recognition model
+
+    lazy (bool)
+        whether to defer loading the named entity recognition model until the first request
     """
-    with get_named_entity_recognition_model() as ner_model:
-        app.state.ner = ner_model
+    app.state.ner = ner_model = ModelLoader("ner", get_ner_model)
+
+    if not lazy:
+        ner_model.start()
+
+    try:
         yield
 
+    finally:
+        ner_model.close()
+
 
-def load_ner_model() -> Callable[[Litestar], AbstractAsyncContextManager[None]]:
+def load_ner_model(config: Config) -> Callable[[Litestar], AbstractAsyncContextManager[None]]:
     """
     Summary
     -------
     return a Litestar-compatible lifespan context manager that loads the named entity recognition model
 
+    Parameters
+    ----------
+    config (Config)
+        the application config
+
     Returns
     -------
     lifespan (Callable[[Litestar], AbstractAsyncContextManager[None]])
         a Litestar-compatible lifespan context manager
     """
-    return ner_model_lifespan
+    factory = partial(
+        get_named_entity_recognition_model,
+        max_batch_size=config.ner_max_batch_size,
+        max_batch_tokens=config.ner_max_batch_tokens,
+        window_overlap=config.ner_window_overlap,
+        batch_window=config.ner_batch_window_ms / 1000,
+        cache_bytes=config.ner_cache_bytes,
+        cache_path=config.ner_cache_path,
+        cache_disk_bytes=config.ner_cache_disk_bytes,
+    )
+
+    lazy = "ner" in config.lazy_models
+    return lambda app: ner_model_lifespan(app, get_ner_model=factory, lazy=lazy)
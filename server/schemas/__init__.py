@@ -1 +1,2 @@
 from server.schemas.health import Health as Health
+from server.schemas.readiness import Readiness as Readiness
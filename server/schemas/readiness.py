@@ -0,0 +1,26 @@
+from msgspec import Struct
+
+from server.utils import ModelStatus
+
+
+class Readiness(Struct, kw_only=True, frozen=True, gc=False):
+    """
+    Summary
+    -------
+    the readiness response schema
+
+    Attributes
+    ----------
+    ready (bool)
+        whether every model that is not deferred has finished loading
+
+    chat (ModelStatus)
+        the loading status of the chat model
+
+    ner (ModelStatus)
+        the loading status of the named entity recognition model
+    """
+
+    ready: bool
+    chat: ModelStatus
+    ner: ModelStatus
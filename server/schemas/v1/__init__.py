@@ -1,4 +1,8 @@
 from server.schemas.v1.answer import Answer as Answer
 from server.schemas.v1.benchmark import Benchmark as Benchmark
 from server.schemas.v1.entities import Entities as Entities
+from server.schemas.v1.entities_batch import EntitiesBatch as EntitiesBatch
+from server.schemas.v1.entity_spans import EntitySpans as EntitySpans
+from server.schemas.v1.entity_spans_batch import EntitySpansBatch as EntitySpansBatch
 from server.schemas.v1.query import Query as Query
+from server.schemas.v1.texts import Texts as Texts
@@ -0,0 +1,20 @@
+from collections.abc import Sequence
+
+from msgspec import Struct
+
+from server.features.ner import Entity
+
+
+class EntitiesBatch(Struct, kw_only=True, frozen=True, gc=False):
+    """
+    Summary
+    -------
+    the batched entities response schema
+
+    Attributes
+    ----------
+    entities (Sequence[Sequence[Entity]])
+        the named entities of each text, in the order the texts were given
+    """
+
+    entities: Sequence[Sequence[Entity]]
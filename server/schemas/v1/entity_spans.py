@@ -0,0 +1,20 @@
+from collections.abc import Sequence
+
+from msgspec import Struct
+
+from server.features.ner import EntitySpan
+
+
+class EntitySpans(Struct, kw_only=True, frozen=True, gc=False):
+    """
+    Summary
+    -------
+    the aggregated entities response schema
+
+    Attributes
+    ----------
+    entities (Sequence[EntitySpan])
+        the entity spans
+    """
+
+    entities: Sequence[EntitySpan]
@@ -0,0 +1,20 @@
+from collections.abc import Sequence
+
+from msgspec import Struct
+
+from server.features.ner import EntitySpan
+
+
+class EntitySpansBatch(Struct, kw_only=True, frozen=True, gc=False):
+    """
+    Summary
+    -------
+    the batched aggregated entities response schema
+
+    Attributes
+    ----------
+    entities (Sequence[Sequence[EntitySpan]])
+        the entity spans of each text, in the order the texts were given
+    """
+
+    entities: Sequence[Sequence[EntitySpan]]
@@ -16,9 +16,41 @@ class Query(Struct, kw_only=True, frozen=True, gc=False):
     ----------
     messages (Sequence[Message])
         the messages to send to the LLM
+
+    static_prompt (str | None)
+        the name of the static prompt to precede the messages with
+
+    model (str | None)
+        the name of the chat model to query, or `None` for the default model
+
+    max_tokens (int | None)
+        the maximum number of tokens to generate, or `None` for the model's maximum
+
+    temperature (float)
+        the temperature to sample with, or `0` for greedy decoding
+
+    top_k (int)
+        the number of most likely tokens to sample from, or `0` for the full vocabulary
+
+    top_p (float)
+        the cumulative probability of the most likely tokens to sample from
+
+    stop (tuple[str, ...])
+        the sequences that end the answer when generated, excluded from the answer
+
+    seed (int | None)
+        the seed to sample with, or `None` for a random seed, reproducible only on a best-effort basis
     """
 
     messages: Annotated[
         Sequence[Message],
         Meta(examples=[[{"role": "user", "content": "What is the definition of ADHD?"}]]),
     ]
+    static_prompt: Annotated[str | None, Meta(min_length=1)] = None
+    model: Annotated[str | None, Meta(min_length=1)] = None
+    max_tokens: Annotated[int | None, Meta(ge=1)] = None
+    temperature: Annotated[float, Meta(ge=0, le=2)] = 0
+    top_k: Annotated[int, Meta(ge=0)] = 0
+    top_p: Annotated[float, Meta(gt=0, le=1)] = 1
+    stop: Annotated[tuple[Annotated[str, Meta(min_length=1, max_length=32)], ...], Meta(max_length=4)] = ()
+    seed: Annotated[int | None, Meta(ge=0, le=2**32 - 1)] = None
@@ -0,0 +1,30 @@
+from collections.abc import Sequence
+from typing import Annotated
+
+from msgspec import Meta, Struct
+
+
+class Texts(Struct, kw_only=True, frozen=True, gc=False):
+    """
+    Summary
+    -------
+    the batched named entity recognition request schema
+
+    Attributes
+    ----------
+    texts (Sequence[str])
+        the texts to extract named entities from, at most 256 per request
+
+    aggregate (bool)
+        whether to aggregate the tokens of each entity into a single span
+    """
+
+    texts: Annotated[
+        Sequence[Annotated[str, Meta(min_length=1)]],
+        Meta(
+            min_length=1,
+            max_length=256,
+            examples=[["Hello, my name is John and I live in New York.", "Apple was founded by Steve Jobs."]],
+        ),
+    ]
+    aggregate: bool = False
@@ -1,3 +1,6 @@
+from server.typedefs.chat_model_spec import ChatModelSpec as ChatModelSpec
+from server.typedefs.chat_model_tier import ChatModelTier as ChatModelTier
 from server.typedefs.event import Event as Event
 from server.typedefs.message import Message as Message
 from server.typedefs.state import AppState as AppState
+from server.typedefs.static_prompt import StaticPrompt as StaticPrompt
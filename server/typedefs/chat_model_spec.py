@@ -0,0 +1,20 @@
+from typing import TypedDict
+
+
+class ChatModelSpec(TypedDict):
+    """
+    Summary
+    -------
+    a CTranslate2 chat model that queries can select by name
+
+    Attributes
+    ----------
+    repository (str)
+        the Hugging Face repository of the model
+
+    max_context_length (int)
+        the maximum number of tokens the model can attend to, counting the static prompt and the generated tokens
+    """
+
+    repository: str
+    max_context_length: int
@@ -0,0 +1,20 @@
+from typing import TypedDict
+
+
+class ChatModelTier(TypedDict):
+    """
+    Summary
+    -------
+    a chat model that queries which do not select one are routed to by their estimated length
+
+    Attributes
+    ----------
+    model (str)
+        the name of the chat model
+
+    max_prompt_tokens (int)
+        the estimated number of prompt tokens up to which queries are routed to the model
+    """
+
+    model: str
+    max_prompt_tokens: int
@@ -5,8 +5,10 @@ from typing import TYPE_CHECKING
 from litestar.datastructures import State
 
 if TYPE_CHECKING:
-    from server.features.chat import ChatAgentProtocol
+    from server.config import Config
+    from server.features.chat import AdmittedChatAgent
     from server.features.ner import NamedEntityRecognitionProtocol
+    from server.utils import ModelLoader
 
 
 class AppState(State):
@@ -17,12 +19,16 @@ class AppState(State):
 
     Attributes
     ----------
-    chat (ChatAgentProtocol)
-        the LLM chat model
+    config (Config)
+        the application config
 
-    ner (NamedEntityRecognitionProtocol)
-        the named entity recognition model
+    chat (ModelLoader[AdmittedChatAgent])
+        the loader of the LLM chat model
+
+    ner (ModelLoader[NamedEntityRecognitionProtocol])
+        the loader of the named entity recognition model
     """
 
-    chat: ChatAgentProtocol
-    ner: NamedEntityRecognitionProtocol
+    config: Config
+    chat: ModelLoader[AdmittedChatAgent]
+    ner: ModelLoader[NamedEntityRecognitionProtocol]
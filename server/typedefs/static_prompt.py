@@ -0,0 +1,20 @@
+from typing import TypedDict
+
+
+class StaticPrompt(TypedDict):
+    """
+    Summary
+    -------
+    a static prompt that precedes every query that selects it
+
+    Attributes
+    ----------
+    user (str)
+        the static user prompt
+
+    assistant (str)
+        the static assistant prompt
+    """
+
+    user: str
+    assistant: str
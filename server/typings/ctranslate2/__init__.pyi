@@ -3,7 +3,6 @@ from collections.abc import Generator as PythonGenerator
 from typing import Any, BinaryIO, Literal, Self, overload
 
 from numpy.typing import NDArray
-from torch import Tensor
 
 type Devices = Literal["cpu", "cuda", "auto"]
 type ComputeType = Literal[
@@ -31,7 +30,7 @@ class StorageView:
     shape: list[int]
 
     @classmethod
-    def from_array(cls, array: Tensor | NDArray[Any]) -> Self: ...
+    def from_array(cls, array: NDArray[Any]) -> Self: ...
 
 class EncoderForwardOutput:
     last_hidden_state: StorageView
@@ -431,3 +430,5 @@ class Generator:
         cache_static_prompt: bool = True,
         callback: Callable[[GenerationStepResult], bool] | None = None,
     ) -> AsyncGenerator[GenerationStepResult[float]]: ...
+
+def set_random_seed(seed: int) -> None: ...
@@ -1,2 +1,4 @@
+from server.utils.model_loader import ModelLoader as ModelLoader
+from server.utils.model_loader import ModelStatus as ModelStatus
 from server.utils.network import huggingface_download as huggingface_download
 from server.utils.persistent_connection import PersistentConnection as PersistentConnection
@@ -0,0 +1,138 @@
+from collections.abc import Callable
+from concurrent.futures import Future, wait
+from contextlib import AbstractContextManager
+from threading import Lock, Thread
+from typing import Literal
+
+type ModelStatus = Literal["deferred", "loading", "ready", "failed"]
+
+
+class ModelLoader[T: AbstractContextManager[object]]:
+    """
+    Summary
+    -------
+    loads a model on a background thread, either immediately or on first use
+
+    Parameters
+    ----------
+    name (str)
+        the name of the model
+
+    factory (Callable[[], T])
+        the factory that loads the model
+
+    Methods
+    -------
+    start() -> None
+        start loading the model if it is not already loading
+
+    get() -> T
+        get the model, waiting for it to load
+
+    unload(future: Future[T]) -> None
+        unload the model held by a resolved future
+
+    close() -> None
+        unload the model once it has finished loading
+    """
+
+    __slots__ = ("factory", "future", "lock", "name")
+
+    close_timeout = 30
+
+    def __init__(self, name: str, factory: Callable[[], T]) -> None:
+        self.name = name
+        self.factory = factory
+        self.future: Future[T] | None = None
+        self.lock = Lock()
+
+    @property
+    def status(self) -> ModelStatus:
+        """
+        Summary
+        -------
+        the loading status of the model
+        """
+        if (future := self.future) is None:
+            return "deferred"
+
+        if not future.done():
+            return "loading"
+
+        return "failed" if future.exception() else "ready"
+
+    def load(self, future: Future[T]) -> None:
+        """
+        Summary
+        -------
+        load the model into the future
+
+        Parameters
+        ----------
+        future (Future[T])
+            the future to resolve with the model
+        """
+        try:
+            model = self.factory()
+            model.__enter__()
+            future.set_result(model)
+
+        except Exception as exception:  # noqa: BLE001
+            future.set_exception(exception)
+
+    def start(self) -> None:
+        """
+        Summary
+        -------
+        start loading the model if it is not already loading
+        """
+        with self.lock:
+            if self.future is not None:
+                return
+
+            self.future = Future()
+            self.future.set_running_or_notify_cancel()
+
+        Thread(target=self.load, args=(self.future,), name=f"{self.name}-loader", daemon=True).start()
+
+    def get(self) -> T:
+        """
+        Summary
+        -------
+        get the model, waiting for it to load
+
+        Returns
+        -------
+        model (T)
+            the loaded model
+        """
+        self.start()
+        assert self.future is not None  # noqa: S101
+        return self.future.result()
+
+    def unload(self, future: Future[T]) -> None:
+        """
+        Summary
+        -------
+        unload the model held by a resolved future, unless it failed to load
+
+        Parameters
+        ----------
+        future (Future[T])
+            the resolved future holding the model
+        """
+        if future.exception() is None:
+            future.result().__exit__(None, None, None)
+
+    def close(self) -> None:
+        """
+        Summary
+        -------
+        unload the model once it has finished loading, waiting a bounded time for an in-flight load and otherwise
+        unloading the model on the loader thread as soon as it is loaded
+        """
+        if (future := self.future) is None:
+            return
+
+        wait((future,), timeout=self.close_timeout)
+        future.add_done_callback(self.unload)
@@ -1,5 +1,3 @@
-from huggingface_hub import snapshot_download
-
 from server.utils.network.has_internet_access import has_internet_access
 
 
@@ -17,7 +15,10 @@ def huggingface_download(repository: str) -> str:
     -------
     repository_path (str) : local path to the downloaded repository
     """
+    from huggingface_hub import snapshot_download  # noqa: PLC0415
+    from huggingface_hub.constants import HF_HUB_OFFLINE  # noqa: PLC0415
+
     return snapshot_download(
         repository,
-        local_files_only=not has_internet_access(repository),
+        local_files_only=HF_HUB_OFFLINE or not has_internet_access(repository),
     )
@@ -30,6 +30,7 @@ class PersistentConnection:
         exc_value: BaseException | None,
         traceback: TracebackType | None,
     ) -> None:
+        self.task_group.cancel_scope.cancel()
         await self.task_group.__aexit__(exc_type, exc_value, traceback)
 
     async def watch_for_disconnect(self) -> None: